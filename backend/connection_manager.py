@@ -9,14 +9,31 @@ Decisão arquitetural:
 - Pool de conexões mantido em memória (Set) para performance O(1) em adição/remoção
 - Não há persistência em banco por ser um requisito explícito do projeto
 - A estrutura é perdida ao reiniciar o servidor, comportamento esperado
+- Envios passam pela Outbox de cada conexão (lanes de prioridade), ver outbound.py
+- Publicações dos clientes são distribuídas pelo BroadcastScheduler em fatias,
+  com round-robin entre publicadores, ver scheduler.py
 """
 
 from fastapi import WebSocket
-from typing import Set
+from typing import Dict, Hashable, Iterable, Optional, Set
+import asyncio
+import json
 import logging
+import random
+import sys
+
+from metrics import StageTimer, TrafficCounters, current_rss
+from outbound import DEFAULT_MAX_LANE_SIZE, Outbox, Priority
+from scheduler import DEFAULT_SLICE_SIZE, BroadcastScheduler
 
 logger = logging.getLogger(__name__)
 
+# Código de fechamento WebSocket para "Service Restart" (RFC 6455 / IANA)
+CLOSE_CODE_SERVICE_RESTART = 1012
+
+# Código de fechamento WebSocket para "Policy Violation" (RFC 6455)
+CLOSE_CODE_POLICY_VIOLATION = 1008
+
 
 class ConnectionManager:
     """
@@ -28,10 +45,22 @@ class ConnectionManager:
     - Broadcast de mensagens para todas as conexões ativas
     """
     
-    def __init__(self):
+    def __init__(self, max_lane_size: int = DEFAULT_MAX_LANE_SIZE, slice_size: int = DEFAULT_SLICE_SIZE):
         # Pool de conexões ativas mantido em memória
         # Utilizando Set para garantir unicidade e performance em operações de busca
         self.active_connections: Set[WebSocket] = set()
+        # Fila de saída (lanes de prioridade) de cada conexão
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+        self.max_lane_size = max_lane_size
+        # Tráfego de eventos do processo (entrada registrada pelo endpoint)
+        self.counters = TrafficCounters()
+        # Em modo drain o servidor não aceita novas conexões e migra as existentes
+        self.draining = False
+        # Incrementado a cada conexão nova: o scheduler reaproveita a cópia do
+        # pool enquanto ninguém entra (saídas são ignoradas pelo fan_out)
+        self.pool_version = 0
+        # Fan-out fatiado e justo entre publicadores
+        self.scheduler = BroadcastScheduler(self, slice_size=slice_size)
     
     async def connect(self, websocket: WebSocket):
         """
@@ -42,6 +71,8 @@ class ConnectionManager:
         """
         await websocket.accept()
         self.active_connections.add(websocket)
+        self.pool_version += 1
+        self._outbox(websocket)
         logger.info(f"Nova conexão estabelecida. Total de conexões: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
@@ -49,43 +80,314 @@ class ConnectionManager:
         Remove uma conexão do pool de conexões ativas.
         
         Chamado quando o cliente desconecta ou quando ocorre erro na conexão.
+        Chamadas repetidas para a mesma conexão (ex.: drain seguido do próprio
+        endpoint) não têm efeito.
         
         Args:
             websocket: Instância do WebSocket a ser removida
         """
-        self.active_connections.discard(websocket)
-        logger.info(f"Conexão encerrada. Total de conexões: {len(self.active_connections)}")
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox is not None:
+            outbox.close()
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+            logger.info(f"Conexão encerrada. Total de conexões: {len(self.active_connections)}")
+    
+    def _outbox(self, websocket: WebSocket) -> Optional[Outbox]:
+        """
+        Retorna a Outbox da conexão, criando-a se necessário.
+        
+        Conexões fora do pool não recebem Outbox (já foram desconectadas).
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is None and websocket in self.active_connections:
+            outbox = Outbox(
+                websocket,
+                on_error=self.disconnect,
+                max_lane_size=self.max_lane_size,
+                counters=self.counters,
+            )
+            self.outboxes[websocket] = outbox
+        return outbox
+    
+    def send(self, websocket: WebSocket, message: str, priority: Priority = Priority.CONTROL) -> bool:
+        """
+        Enfileira uma mensagem para uma única conexão.
+        
+        Usado para respostas diretas ao cliente (erros, avisos), que por padrão
+        seguem na lane de controle e passam à frente dos eventos enfileirados.
+        Se a lane de controle estiver cheia (cliente que envia sem ler as
+        respostas), a conexão é removida do pool; o endpoint a fecha com 1008.
+        
+        Args:
+            websocket: Conexão de destino
+            message: Mensagem em formato JSON string
+            priority: Lane de destino
+        
+        Returns:
+            bool: True se a mensagem foi enfileirada
+        """
+        outbox = self._outbox(websocket)
+        if outbox is None:
+            return False
+        if not outbox.put(message, priority):
+            logger.warning("Lane de controle cheia: cliente não consome as respostas, encerrando conexão")
+            self.disconnect(websocket)
+            return False
+        return True
     
-    async def broadcast(self, message: str, sender: WebSocket = None):
+    async def broadcast(self, message: str, sender: WebSocket = None, priority: Priority = Priority.REALTIME) -> int:
         """
         Envia uma mensagem para todas as conexões ativas, exceto o remetente.
         
         Decisão de design:
         - O broadcast não envia a mensagem de volta para o remetente
+        - A mensagem é enfileirada na lane de cada conexão; o envio é feito pelo
+          writer da conexão, então um cliente lento não atrasa os demais
         - Conexões que falharem ao receber são automaticamente removidas
-        - A operação é assíncrona para não bloquear outras conexões
+        - O pool inteiro é percorrido de uma vez; publicações de clientes usam
+          publish, que divide o fan-out em fatias
         
         Args:
             message: Mensagem em formato JSON string a ser enviada
             sender: WebSocket do remetente (opcional). Se fornecido, não receberá a mensagem
+            priority: Lane usada na fila de saída de cada conexão
+        
+        Returns:
+            int: Quantidade de conexões para as quais a mensagem foi enfileirada
+        """
+        # Iterar sobre uma cópia: falhas de envio podem remover conexões
+        return self.fan_out(list(self.active_connections), message, sender, priority)
+    
+    async def publish(
+        self,
+        message: str,
+        sender: WebSocket = None,
+        priority: Priority = Priority.REALTIME,
+        publisher: Optional[Hashable] = None,
+        timer: Optional[StageTimer] = None,
+    ) -> int:
+        """
+        Faz o broadcast pelo scheduler e aguarda o fim do fan-out.
+        
+        Enquanto aguarda, o event loop atende as demais conexões e publicadores.
+        
+        Args:
+            message: Mensagem em formato JSON string a ser enviada
+            sender: WebSocket do remetente, que não receberá a mensagem
+            priority: Lane usada na fila de saída de cada conexão
+            publisher: Chave de justiça entre publicadores (padrão: o remetente)
+            timer: Marcas de tempo da publicação
+        
+        Returns:
+            int: Quantidade de conexões para as quais a mensagem foi enfileirada
+        """
+        return await self.scheduler.submit(message, sender, priority, publisher=publisher, timer=timer)
+    
+    def fan_out(
+        self,
+        connections: Iterable[WebSocket],
+        message: str,
+        sender: WebSocket = None,
+        priority: Priority = Priority.REALTIME,
+    ) -> int:
         """
-        disconnected = []
+        Enfileira a mensagem para as conexões informadas que ainda estão no pool.
+        
+        Args:
+            connections: Conexões de destino
+            message: Mensagem em formato JSON string
+            sender: WebSocket do remetente, que não receberá a mensagem
+            priority: Lane usada na fila de saída de cada conexão
         
-        for connection in self.active_connections:
+        Returns:
+            int: Quantidade de conexões para as quais a mensagem foi enfileirada
+        """
+        recipients = 0
+        for connection in connections:
             # Não enviar a mensagem de volta para o remetente
             if connection == sender:
                 continue
             
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                # Se houver erro ao enviar, marcar conexão para remoção
-                logger.warning(f"Erro ao enviar mensagem para conexão: {e}")
-                disconnected.append(connection)
-        
-        # Remover conexões que falharam
-        for connection in disconnected:
-            self.disconnect(connection)
+            outbox = self._outbox(connection)
+            if outbox is not None:
+                outbox.put(message, priority)
+                recipients += 1
+        
+        return recipients
+    
+    async def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Aguarda os broadcasts agendados e o esvaziamento das filas de saída de
+        todas as conexões.
+        
+        Args:
+            timeout: Tempo máximo de espera em segundos
+        
+        Returns:
+            bool: True se todas as filas foram esvaziadas a tempo
+        """
+        async def wait_all():
+            await self.scheduler.join()
+            await asyncio.gather(*(outbox.join() for outbox in list(self.outboxes.values())))
+        
+        try:
+            await asyncio.wait_for(wait_all(), timeout=timeout)
+        except asyncio.TimeoutError:
+            queued = sum(len(outbox) for outbox in self.outboxes.values())
+            logger.warning(f"Flush expirou com {queued} mensagem(ns) na fila")
+            return False
+        return True
+    
+    async def drain(
+        self,
+        batch_size: int = 100,
+        batch_interval: float = 0.5,
+        reconnect_jitter_ms: int = 2000,
+        flush_timeout: float = 5.0,
+        timeout: Optional[float] = None,
+    ):
+        """
+        Migra as conexões ativas para outro processo de forma escalonada.
+        
+        Usado no restart sem downtime: o novo processo já escuta a mesma porta
+        (SO_REUSEPORT) e este processo deixa de aceitar conexões. Para evitar que
+        todos os clientes reconectem ao mesmo tempo, as conexões são fechadas em
+        lotes, cada uma recebendo antes uma dica de reconexão com atraso aleatório.
+        
+        O escalonamento leva cerca de (conexões / batch_size) * batch_interval
+        segundos. Se o prazo total (timeout) não comporta o próximo lote, as
+        conexões restantes são fechadas de uma vez: o processo precisa terminar
+        antes do SIGKILL do orquestrador.
+        
+        Args:
+            batch_size: Quantidade de conexões fechadas por lote
+            batch_interval: Intervalo em segundos entre lotes
+            reconnect_jitter_ms: Atraso máximo sugerido ao cliente antes de reconectar
+            flush_timeout: Tempo máximo para concluir os envios pendentes e, por
+                conexão, para entregar a dica de reconexão
+            timeout: Prazo total do drain em segundos (None: sem prazo)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        
+        def remaining(limit: float) -> float:
+            if deadline is None:
+                return limit
+            return max(0.0, min(limit, deadline - loop.time()))
+        
+        self.draining = True
+        await self.flush(timeout=remaining(flush_timeout))
+        
+        connections = list(self.active_connections)
+        batches = -(-len(connections) // batch_size)
+        logger.info(f"Iniciando drain de {len(connections)} conexão(ões) em lotes de {batch_size}")
+        if timeout is not None and (batches - 1) * batch_interval > timeout:
+            logger.warning(
+                f"Drain escalonado levaria {(batches - 1) * batch_interval:.1f}s, acima do prazo de "
+                f"{timeout:.1f}s: aumente DRAIN_BATCH_SIZE ou reduza DRAIN_BATCH_INTERVAL"
+            )
+        
+        start = 0
+        while start < len(connections):
+            end = start + batch_size
+            if start > 0:
+                if deadline is not None and loop.time() + batch_interval >= deadline:
+                    # Sem tempo para o próximo intervalo: fechar o restante agora
+                    end = len(connections)
+                    logger.warning(f"Prazo do drain esgotado, fechando {end - start} conexão(ões) restantes")
+                else:
+                    await asyncio.sleep(batch_interval)
+            
+            await asyncio.gather(*(
+                self._migrate(connection, reconnect_jitter_ms, remaining(flush_timeout))
+                for connection in connections[start:end]
+            ))
+            start = end
+        
+        logger.info("Drain concluído")
+    
+    async def _migrate(self, websocket: WebSocket, reconnect_jitter_ms: int, flush_timeout: float = 5.0):
+        """
+        Envia a dica de reconexão e fecha a conexão com o código 1012.
+        
+        Um consumidor travado não segura o lote: se a dica não for entregue
+        em flush_timeout, a conexão é fechada mesmo assim.
+        
+        Args:
+            websocket: Conexão a ser migrada
+            reconnect_jitter_ms: Atraso máximo sugerido ao cliente antes de reconectar
+            flush_timeout: Tempo máximo para entregar a dica de reconexão
+        """
+        hint = {
+            "type": "reconnect",
+            "reason": "server_restart",
+            "retry_after_ms": random.randint(0, reconnect_jitter_ms),
+        }
+        try:
+            # A dica segue pela lane de controle, após o restante da fila
+            # já esvaziado pelo flush
+            outbox = self._outbox(websocket)
+            if outbox is not None:
+                outbox.put(json.dumps(hint), Priority.CONTROL)
+                try:
+                    await asyncio.wait_for(outbox.join(), timeout=flush_timeout)
+                except asyncio.TimeoutError:
+                    logger.debug("Dica de reconexão não entregue a tempo, fechando a conexão")
+                # Interromper o writer antes do close: um envio travado não
+                # pode disputar o socket com o frame de fechamento
+                outbox.close()
+            await asyncio.wait_for(
+                websocket.close(code=CLOSE_CODE_SERVICE_RESTART, reason="Service restart"),
+                timeout=max(flush_timeout, 0.1),
+            )
+        except Exception as e:
+            # Conexão já encerrada pelo cliente: nada a migrar
+            logger.debug(f"Erro ao migrar conexão: {e}")
+        finally:
+            self.disconnect(websocket)
+    
+    def get_queue_stats(self) -> Dict[str, int]:
+        """
+        Profundidade das filas de saída das conexões.
+        
+        Usa os contadores mantidos pelas Outboxes e percorre apenas as filas
+        com mensagens pendentes, não o pool inteiro.
+        
+        Returns:
+            Dict[str, int]: total e max de mensagens enfileiradas, e mensagens
+            descartadas por excesso de fila desde o início do processo
+        """
+        return {
+            "total": self.counters.queued,
+            "max": max((len(outbox) for outbox in self.counters.backlogged), default=0),
+            "dropped": self.counters.dropped,
+        }
+    
+    def get_memory_stats(self) -> Dict[str, float]:
+        """
+        Memória contabilizada pelo manager para as conexões ativas.
+        
+        Soma as tabelas do pool e do índice de filas, o tamanho constante das
+        Outboxes ociosas, a estrutura das Outboxes com mensagens pendentes e o
+        total de mensagens enfileiradas mantido pelos contadores, sem percorrer
+        as filas. Objetos do framework (WebSocket, task do endpoint) não entram
+        na conta; o RSS do processo é informado para comparação.
+        
+        Returns:
+            Dict[str, float]: bytes contabilizados, média por conexão e RSS do processo
+        """
+        connections = len(self.active_connections)
+        backlogged = [outbox for outbox in self.counters.backlogged if outbox.websocket in self.outboxes]
+        accounted = sys.getsizeof(self.active_connections) + sys.getsizeof(self.outboxes)
+        accounted += (len(self.outboxes) - len(backlogged)) * Outbox.idle_memory_size()
+        accounted += sum(outbox.structure_size() for outbox in backlogged)
+        accounted += self.counters.queued_bytes
+        return {
+            "accounted_bytes": accounted,
+            "per_connection_bytes": round(accounted / connections, 1) if connections else 0.0,
+            "rss_bytes": current_rss(),
+        }
     
     def get_connection_count(self) -> int:
         """
@@ -0,0 +1,114 @@
+"""
+Dedup - Janela de deduplicação de publicações idempotentes
+
+Publicadores reenviam uma mensagem quando não sabem se o envio anterior
+chegou (por exemplo, após uma reconexão). Com uma chave de idempotência, a
+repetição é reconhecida e descartada antes da validação e do fan-out, em vez
+de virar um segundo broadcast para todos os clientes.
+
+Decisões de design:
+- Dicionário ordenado por inserção com TTL fixo: a entrada mais antiga é
+  sempre a primeira a expirar, então a limpeza só olha o início da fila
+- Janela limitada por tempo (ttl) e por tamanho (max_size): memória
+  constante mesmo sob chaves únicas em alto volume. Se a janela encher antes
+  do TTL, as chaves mais antigas saem primeiro
+- Dedup exato (sem falsos positivos): descartar uma publicação legítima
+  seria pior que aceitar uma duplicata rara fora da janela
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict
+import sys
+import time
+
+
+class DedupWindow:
+    """
+    Conjunto de chaves de idempotência vistas recentemente.
+
+    Attributes:
+        max_size: Quantidade máxima de chaves mantidas
+        ttl: Tempo em segundos que uma chave permanece na janela
+        hits: Publicações descartadas por duplicidade
+        misses: Chaves novas registradas
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size: Quantidade máxima de chaves mantidas
+            ttl: Tempo em segundos que uma chave permanece na janela
+            clock: Relógio monotônico em segundos (injetável para testes)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        # chave -> instante de expiração, em ordem de inserção
+        self._expires: "OrderedDict[str, float]" = OrderedDict()
+        self._key_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def _evict(self, now: float):
+        expires = self._expires
+        while expires:
+            key, deadline = next(iter(expires.items()))
+            if deadline > now and len(expires) <= self.max_size:
+                break
+            expires.popitem(last=False)
+            self._key_bytes -= sys.getsizeof(key)
+
+    def seen(self, key: str) -> bool:
+        """
+        Verifica se a chave já foi registrada e ainda está na janela.
+
+        Conta um hit quando está. Não registra a chave.
+
+        Args:
+            key: Chave de idempotência
+
+        Returns:
+            bool: True se a publicação é uma repetição
+        """
+        self._evict(self._clock())
+        if key in self._expires:
+            self.hits += 1
+            return True
+        return False
+
+    def add(self, key: str):
+        """
+        Registra uma chave nova na janela.
+
+        Args:
+            key: Chave de idempotência de uma publicação aceita
+        """
+        if key in self._expires:
+            return
+        now = self._clock()
+        self._expires[key] = now + self.ttl
+        self._key_bytes += sys.getsizeof(key)
+        self.misses += 1
+        self._evict(now)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Métricas da janela.
+
+        Returns:
+            Dict[str, float]: hits, misses, hit_rate, size e memory_bytes estimados
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self._expires),
+            # Tabela do dicionário + chaves + um float de expiração por entrada
+            "memory_bytes": sys.getsizeof(self._expires)
+            + self._key_bytes
+            + len(self._expires) * sys.getsizeof(0.0),
+        }
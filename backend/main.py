@@ -16,10 +16,16 @@ Não implementamos autenticação, banco de dados ou cache por escolha de escopo
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+import asyncio
 import logging
 import json
-from connection_manager import ConnectionManager
-from models import IncomingMessage, WebSocketMessage
+from connection_manager import ConnectionManager, CLOSE_CODE_POLICY_VIOLATION, CLOSE_CODE_SERVICE_RESTART
+from dedup import DedupWindow
+from metrics import LatencyTracker, StageTimer
+from models import IncomingMessage, PublishAck, WebSocketMessage, valid_correlation_id
+from outbound import Priority
+from stats import StatsAggregator
 
 # Configuração de logging
 logging.basicConfig(
@@ -49,6 +55,15 @@ app.add_middleware(
 # Mantida em memória durante o ciclo de vida da aplicação
 manager = ConnectionManager()
 
+# Latências por estágio do pipeline de publicação (janela deslizante)
+latency_tracker = LatencyTracker()
+
+# Chaves de idempotência recentes (limitadas por tempo e quantidade)
+dedup_window = DedupWindow()
+
+# Estatísticas agregadas publicadas em /ws/stats (um cálculo por tick)
+stats_aggregator = StatsAggregator(manager, latency_tracker, dedup_window=dedup_window)
+
 
 @app.get("/")
 async def root():
@@ -68,11 +83,61 @@ async def health_check():
     Health check endpoint para monitoramento.
     """
     return {
-        "status": "healthy",
+        "status": "draining" if manager.draining else "healthy",
         "connections": manager.get_connection_count()
     }
 
 
+@app.get("/stats")
+async def stats():
+    """
+    Snapshot das estatísticas do servidor (o mesmo publicado em /ws/stats).
+    
+    Latências em ms por intervalo do pipeline: validate (recebida -> validada),
+    serialize (validada -> início do fan-out: montagem e serialização do
+    evento), schedule (espera no scheduler de broadcast), fanout
+    (enfileiramento para todos os assinantes) e total.
+    
+    Em dedup, a taxa de publicações descartadas por idempotency_key repetida
+    e o tamanho da janela.
+    
+    A consulta não registra amostras: com viewers em /ws/stats devolve o
+    snapshot do último tick, sem viewers calcula as taxas até o instante atual.
+    """
+    return Response(content=stats_aggregator.current(), media_type="application/json")
+
+
+@app.websocket("/ws/stats")
+async def stats_websocket(websocket: WebSocket):
+    """
+    Stream de estatísticas do servidor para dashboards.
+    
+    A cada tick do StatsAggregator o cliente recebe um snapshot com conexões,
+    mensagens/s e bytes/s de entrada e saída, profundidade das filas,
+    percentis de latência por estágio e atraso do event loop. Mensagens
+    enviadas pelo cliente são ignoradas.
+    
+    Args:
+        websocket: Instância do WebSocket fornecida pelo FastAPI
+    """
+    if manager.draining:
+        await websocket.close(code=CLOSE_CODE_SERVICE_RESTART)
+        return
+    
+    await websocket.accept()
+    stats_aggregator.subscribe(websocket)
+    
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Erro inesperado na conexão de estatísticas: {e}")
+    finally:
+        stats_aggregator.unsubscribe(websocket)
+
+
 @app.websocket("/ws/events")
 async def websocket_endpoint(websocket: WebSocket):
     """
@@ -83,51 +148,119 @@ async def websocket_endpoint(websocket: WebSocket):
     2. Adiciona a conexão ao pool de conexões ativas
     3. Entra em loop de escuta contínua de mensagens
     4. Para cada mensagem recebida:
+       - Descarta reenvios com idempotency_key já vista (antes da validação)
        - Valida o formato
-       - Adiciona timestamp do servidor
-       - Faz broadcast para todos os outros clientes
+       - Adiciona timestamp do servidor e marcas de tempo por estágio
+       - Agenda o broadcast para todos os outros clientes no scheduler, na lane de prioridade pedida
+       - Se houver correlation_id, confirma ao remetente com um PublishAck
     5. Ao desconectar, remove a conexão do pool
+    6. Se o servidor remover a conexão do pool (cliente que envia sem ler as
+       respostas), encerra o loop e fecha com 1008
     
     Args:
         websocket: Instância do WebSocket fornecida pelo FastAPI
     """
+    # Durante o drain, novas conexões são recusadas para que o cliente
+    # reconecte no processo que assumiu a porta
+    if manager.draining:
+        await websocket.close(code=CLOSE_CODE_SERVICE_RESTART)
+        return
+    
     # Aceitar conexão e adicionar ao pool
     await manager.connect(websocket)
     
     try:
-        # Loop infinito de escuta de mensagens
-        while True:
+        # Loop de escuta enquanto a conexão estiver no pool
+        while websocket in manager.active_connections:
             # Aguardar próxima mensagem do cliente
             data = await websocket.receive_text()
+            timer = StageTimer()
+            manager.counters.record_in(len(data))
             
             try:
                 # Parsear e validar mensagem recebida
                 incoming = json.loads(data)
+                
+                # Reenvio de uma publicação já aceita: confirma sem novo broadcast.
+                # Com correlation_id inválido segue para a validação, que responde
+                # com erro, sem contar a duplicata
+                key = incoming.get("idempotency_key") if isinstance(incoming, dict) else None
+                if (
+                    isinstance(key, str)
+                    and valid_correlation_id(incoming.get("correlation_id"))
+                    and dedup_window.seen(key)
+                ):
+                    logger.info(f"Publicação duplicada descartada: {key[:50]}")
+                    if incoming.get("correlation_id") is not None:
+                        ack = PublishAck(
+                            correlation_id=incoming["correlation_id"],
+                            recipients=0,
+                            timings=timer.offsets_ms(),
+                            duplicate=True
+                        )
+                        manager.send(websocket, ack.model_dump_json())
+                    continue
+                
                 validated_message = IncomingMessage(**incoming)
+                # Registrada só depois de validada: um envio inválido não
+                # bloqueia o reenvio corrigido com a mesma chave
+                if validated_message.idempotency_key is not None:
+                    dedup_window.add(validated_message.idempotency_key)
+                timer.mark("validated")
+                
+                logger.info(f"Mensagem recebida e processada: {validated_message.message[:50]}...")
                 
                 # Criar mensagem de broadcast com timestamp do servidor
                 broadcast_message = WebSocketMessage(
-                    message=validated_message.message
-                )
-                
-                logger.info(f"Mensagem recebida e processada: {validated_message.message[:50]}...")
+                    message=validated_message.message,
+                    correlation_id=validated_message.correlation_id,
+                    timings=timer.offsets_ms()
+                ).model_dump_json()
                 
-                # Fazer broadcast para todos os outros clientes
-                await manager.broadcast(
-                    message=broadcast_message.model_dump_json(),
-                    sender=websocket
+                # Fazer broadcast para todos os outros clientes. O fan-out roda
+                # no scheduler, em fatias intercaladas com os demais publicadores
+                timer.mark("fanout_started")
+                recipients = await manager.publish(
+                    message=broadcast_message,
+                    sender=websocket,
+                    priority=Priority[validated_message.priority.upper()],
+                    timer=timer
                 )
+                timer.mark("fanout_done")
+                latency_tracker.record(timer)
+                
+                if validated_message.correlation_id is not None:
+                    ack = PublishAck(
+                        correlation_id=validated_message.correlation_id,
+                        recipients=recipients,
+                        timings=timer.offsets_ms()
+                    )
+                    manager.send(websocket, ack.model_dump_json())
                 
+            # Respostas de erro seguem pela lane de controle, à frente dos eventos
             except json.JSONDecodeError:
                 logger.warning("Mensagem recebida não é um JSON válido")
-                await websocket.send_text(
+                manager.send(
+                    websocket,
                     json.dumps({"error": "Formato de mensagem inválido. Use JSON."})
                 )
             except Exception as e:
                 logger.error(f"Erro ao processar mensagem: {e}")
-                await websocket.send_text(
+                manager.send(
+                    websocket,
                     json.dumps({"error": "Erro ao processar mensagem"})
                 )
+        
+        # Removida do pool durante o processamento: as respostas não foram
+        # consumidas (lane de controle cheia). Conexões já fechadas pelo
+        # drain ou com envio falho apenas ignoram o fechamento
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=CLOSE_CODE_POLICY_VIOLATION, reason="Outbound queue overflow"),
+                timeout=1.0,
+            )
+        except Exception as e:
+            logger.debug(f"Erro ao fechar conexão removida do pool: {e}")
     
     except WebSocketDisconnect:
         # Desconexão normal do cliente
@@ -141,14 +274,8 @@ async def websocket_endpoint(websocket: WebSocket):
 
 
 if __name__ == "__main__":
-    import uvicorn
+    # Execução direta delega ao launcher de produção (server.py).
+    # Para desenvolvimento com auto-reload: uvicorn main:app --reload
+    from server import main
     
-    # Configuração para execução direta do script
-    # Em produção, recomenda-se usar gunicorn com workers uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    main()
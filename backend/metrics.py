@@ -0,0 +1,232 @@
+"""
+Metrics - Métricas de latência e tráfego do servidor
+
+Cada mensagem publicada carrega marcas de tempo monotônicas por estágio do
+pipeline (recebida, validada, início do fan-out após a serialização do
+evento, início da execução no scheduler e fim do fan-out). O LatencyTracker
+mantém uma janela das amostras mais recentes de cada estágio e resume a
+distribuição em percentis.
+
+Decisões de design:
+- Relógio monotônico (time.perf_counter): imune a ajustes do relógio do sistema
+- Janela limitada por estágio (deque com maxlen): memória constante e
+  resumo que reflete o comportamento recente, não o histórico inteiro
+- Percentis calculados sob demanda, fora do caminho quente da publicação
+- Contadores de tráfego são cumulativos e baratos de incrementar; taxas
+  (mensagens/s, bytes/s) são derivadas pelo agregador de estatísticas
+"""
+
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Set, Tuple
+import os
+import resource
+import sys
+import time
+
+# Estágios registrados em cada publicação, na ordem do pipeline
+STAGES = ("received", "validated", "fanout_started", "scheduled", "fanout_done")
+
+# Intervalos resumidos pelo tracker: nome -> (estágio inicial, estágio final)
+SPANS = {
+    "validate": ("received", "validated"),
+    "serialize": ("validated", "fanout_started"),
+    "schedule": ("fanout_started", "scheduled"),
+    "fanout": ("scheduled", "fanout_done"),
+    "total": ("received", "fanout_done"),
+}
+
+
+def now() -> float:
+    """
+    Marca de tempo monotônica em segundos.
+    """
+    return time.perf_counter()
+
+
+def current_rss() -> int:
+    """
+    Memória residente (RSS) atual do processo em bytes.
+
+    Lida de /proc/self/statm no Linux. Em outras plataformas usa o pico de RSS
+    reportado por getrusage, que não diminui quando a memória é liberada.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é em bytes no macOS e em KiB nos demais
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class TrafficCounters:
+    """
+    Contadores de tráfego WebSocket e das filas de saída do processo.
+
+    Tamanhos são medidos em caracteres da mensagem de texto, o que equivale
+    a bytes para o JSON ASCII trafegado e evita codificar cada mensagem só
+    para medi-la.
+
+    As filas são contabilizadas de forma incremental pelas próprias Outboxes,
+    para que o snapshot de estatísticas não precise percorrer todas as
+    conexões (a maioria ociosa) a cada tick.
+
+    Attributes:
+        messages_in: Mensagens recebidas dos clientes
+        bytes_in: Tamanho das mensagens recebidas
+        messages_out: Mensagens entregues aos clientes
+        bytes_out: Tamanho das mensagens entregues
+        queued: Mensagens atualmente enfileiradas nas Outboxes
+        queued_bytes: Memória (sys.getsizeof) das mensagens enfileiradas
+        dropped: Mensagens descartadas por excesso de fila (cumulativo)
+        backlogged: Outboxes com mensagens pendentes
+    """
+
+    __slots__ = (
+        "messages_in",
+        "bytes_in",
+        "messages_out",
+        "bytes_out",
+        "queued",
+        "queued_bytes",
+        "dropped",
+        "backlogged",
+    )
+
+    def __init__(self):
+        self.messages_in = 0
+        self.bytes_in = 0
+        self.messages_out = 0
+        self.bytes_out = 0
+        self.queued = 0
+        self.queued_bytes = 0
+        self.dropped = 0
+        self.backlogged: Set = set()
+
+    def record_in(self, size: int):
+        self.messages_in += 1
+        self.bytes_in += size
+
+    def record_out(self, size: int):
+        self.messages_out += 1
+        self.bytes_out += size
+
+    def totals(self) -> Tuple[int, int, int, int]:
+        """
+        Returns:
+            Tuple[int, int, int, int]: messages_in, bytes_in, messages_out, bytes_out
+        """
+        return self.messages_in, self.bytes_in, self.messages_out, self.bytes_out
+
+
+class StageTimer:
+    """
+    Marcas de tempo dos estágios de uma única publicação.
+
+    Attributes:
+        marks: Estágio -> instante monotônico em segundos
+    """
+
+    def __init__(self, received: float = None):
+        self.marks: Dict[str, float] = {"received": now() if received is None else received}
+
+    def mark(self, stage: str):
+        """
+        Registra o instante atual para o estágio.
+
+        Args:
+            stage: Nome do estágio (ver STAGES)
+        """
+        self.marks[stage] = now()
+
+    def offsets_ms(self) -> Dict[str, float]:
+        """
+        Instantes de cada estágio em milissegundos desde o recebimento.
+
+        Returns:
+            Dict[str, float]: Estágio -> deslocamento em ms, arredondado em µs
+        """
+        start = self.marks["received"]
+        return {
+            stage: round((self.marks[stage] - start) * 1000, 3)
+            for stage in STAGES
+            if stage in self.marks
+        }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Percentil por nearest-rank de uma lista já ordenada.
+
+    Args:
+        sorted_values: Amostras em ordem crescente (não vazia)
+        fraction: Percentil desejado entre 0 e 1
+
+    Returns:
+        float: Valor do percentil
+    """
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    """
+    Resume amostras de latência (em ms) em contagem, média e percentis.
+    """
+    values = sorted(samples)
+    if not values:
+        return {"count": 0, "avg": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values), 3),
+        "p50": percentile(values, 0.50),
+        "p90": percentile(values, 0.90),
+        "p99": percentile(values, 0.99),
+        "max": values[-1],
+    }
+
+
+class LatencyTracker:
+    """
+    Janela deslizante de latências por intervalo do pipeline.
+
+    Attributes:
+        samples: Intervalo (ver SPANS) -> últimas amostras em ms
+    """
+
+    def __init__(self, window: int = 1024):
+        """
+        Args:
+            window: Quantidade de amostras mantidas por intervalo
+        """
+        self.samples: Dict[str, Deque[float]] = {span: deque(maxlen=window) for span in SPANS}
+
+    def record(self, timer: StageTimer):
+        """
+        Registra os intervalos de uma publicação concluída.
+
+        Intervalos cujos estágios não foram marcados são ignorados.
+
+        Args:
+            timer: Marcas de tempo da publicação
+        """
+        marks = timer.marks
+        for span, (start, end) in SPANS.items():
+            if start in marks and end in marks:
+                self.samples[span].append(round((marks[end] - marks[start]) * 1000, 3))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Resumo da distribuição de cada intervalo.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Intervalo -> count, avg, p50, p90, p99, max (ms)
+        """
+        return {span: summarize(samples) for span, samples in self.samples.items()}
+
+    def reset(self):
+        """
+        Descarta todas as amostras.
+        """
+        for samples in self.samples.values():
+            samples.clear()
@@ -5,9 +5,19 @@ Define os modelos de dados utilizados na comunicação WebSocket.
 Utilizamos Pydantic para validação e serialização de dados.
 """
 
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, StringConstraints, TypeAdapter
+from datetime import datetime, timezone
+from typing import Annotated, Dict, Literal, Optional
+
+# ID de correlação escolhido pelo cliente e devolvido no PublishAck
+CorrelationId = Annotated[str, StringConstraints(min_length=1, max_length=128)]
+
+
+def utc_now_iso() -> str:
+    """
+    Timestamp ISO 8601 em UTC, com offset explícito.
+    """
+    return datetime.now(timezone.utc).isoformat()
 
 
 class WebSocketMessage(BaseModel):
@@ -16,19 +26,28 @@ class WebSocketMessage(BaseModel):
     
     Attributes:
         message: Conteúdo da mensagem enviada pelo cliente
-        timestamp: Data/hora de processamento no servidor (gerado automaticamente)
+        timestamp: Data/hora de processamento no servidor, em UTC (gerado automaticamente)
+        correlation_id: ID de correlação informado pelo remetente, se houver
+        timings: Instantes de cada estágio em ms desde o recebimento (relógio monotônico)
     """
     message: str = Field(..., description="Conteúdo da mensagem")
     timestamp: str = Field(
-        default_factory=lambda: datetime.now().isoformat(),
-        description="Timestamp gerado no servidor"
+        default_factory=utc_now_iso,
+        description="Timestamp gerado no servidor (UTC)"
+    )
+    correlation_id: Optional[str] = Field(default=None, description="ID de correlação do remetente")
+    timings: Optional[Dict[str, float]] = Field(
+        default=None,
+        description="Estágio -> ms desde o recebimento no servidor"
     )
     
     class Config:
         json_schema_extra = {
             "example": {
                 "message": "Novo evento recebido",
-                "timestamp": "2026-01-15T14:45:00"
+                "timestamp": "2026-01-15T14:45:00.000000+00:00",
+                "correlation_id": "c0ffee-42",
+                "timings": {"received": 0.0, "validated": 0.081}
             }
         }
 
@@ -39,5 +58,64 @@ class IncomingMessage(BaseModel):
     
     Attributes:
         message: Conteúdo da mensagem enviada pelo cliente
+        correlation_id: ID escolhido pelo cliente para correlacionar o ack
+        priority: Classe de serviço na fila de saída dos assinantes.
+            A lane "control" é reservada ao servidor e não pode ser usada por clientes
+        idempotency_key: Chave escolhida pelo cliente; reenvios com a mesma chave
+            dentro da janela de deduplicação são descartados
     """
     message: str = Field(..., min_length=1, description="Conteúdo da mensagem")
+    correlation_id: Optional[CorrelationId] = Field(
+        default=None,
+        description="ID de correlação; quando informado o servidor responde com um PublishAck"
+    )
+    priority: Literal["realtime", "bulk"] = Field(
+        default="realtime",
+        description="Prioridade de entrega: realtime ou bulk"
+    )
+    idempotency_key: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        max_length=128,
+        description="Chave de idempotência; reenvios com a mesma chave não geram novo broadcast"
+    )
+
+
+_correlation_id_adapter = TypeAdapter(Optional[CorrelationId])
+
+
+def valid_correlation_id(value) -> bool:
+    """
+    Verifica se o valor é um correlation_id aceito por IncomingMessage.
+
+    Usado no caminho de publicações duplicadas, que responde sem validar a
+    mensagem inteira.
+    """
+    try:
+        _correlation_id_adapter.validate_python(value, strict=True)
+    except ValueError:
+        return False
+    return True
+
+
+class PublishAck(BaseModel):
+    """
+    Confirmação enviada ao remetente após o fan-out de uma publicação.
+    
+    Só é enviada quando a mensagem recebida tem correlation_id.
+    
+    Attributes:
+        type: Sempre "ack"
+        correlation_id: ID de correlação informado pelo remetente
+        recipients: Quantidade de conexões para as quais a mensagem foi enfileirada
+        timestamp: Data/hora da confirmação, em UTC
+        timings: Instantes de cada estágio em ms desde o recebimento (relógio monotônico)
+        duplicate: True quando a publicação foi descartada por repetir uma
+            idempotency_key recente; nesse caso recipients é 0
+    """
+    type: Literal["ack"] = "ack"
+    correlation_id: str
+    recipients: int
+    timestamp: str = Field(default_factory=utc_now_iso)
+    timings: Dict[str, float]
+    duplicate: bool = False
@@ -0,0 +1,266 @@
+"""
+Outbound - Fila de saída por conexão com lanes de prioridade
+
+Cada conexão possui uma Outbox com uma lane (fila) por classe de serviço.
+Um único writer por conexão consome as lanes e chama send_text, de modo que
+mensagens de controle (erros, avisos do servidor, dicas de reconexão) não
+esperam atrás de milhares de eventos enfileirados.
+
+Decisões de design:
+- Prioridade com justiça ponderada (weighted round-robin): a cada ciclo cada
+  lane pode enviar até "peso" mensagens, servindo sempre a lane mais
+  prioritária que ainda tem crédito. Lanes inferiores nunca ficam sem envio
+- O writer é criado sob demanda e encerra quando as lanes esvaziam, então
+  conexões ociosas não mantêm uma task viva
+- Conexões ociosas são a maioria: as lanes só são alocadas quando recebem
+  mensagem e são liberadas quando o writer esvazia a fila, e a Outbox usa
+  __slots__ (sem __dict__ por instância)
+- Lanes realtime e bulk são limitadas: em excesso a mensagem mais antiga é
+  descartada (consumidor lento não faz a memória crescer sem limite)
+- A lane de controle também é limitada, mas nela nada é descartado: as
+  respostas são geradas pelo próprio cliente (erros, acks), então um cliente
+  que envia sem ler encheria a fila sem limite. Cheia, put recusa a mensagem
+  e quem enfileirou encerra a conexão
+"""
+
+from collections import deque
+from enum import IntEnum
+from typing import Callable, Deque, List, Optional, Tuple
+import asyncio
+import logging
+import sys
+
+from fastapi import WebSocket
+
+from metrics import TrafficCounters
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """
+    Classes de serviço do caminho de saída, da mais para a menos prioritária.
+    """
+    CONTROL = 0
+    REALTIME = 1
+    BULK = 2
+
+
+# Mensagens enviadas por lane a cada ciclo quando todas têm fila
+DEFAULT_WEIGHTS: Tuple[int, ...] = (8, 4, 1)
+
+# Limite de mensagens enfileiradas nas lanes realtime e bulk
+DEFAULT_MAX_LANE_SIZE = 1024
+
+# Limite de mensagens enfileiradas na lane de controle
+DEFAULT_MAX_CONTROL_SIZE = 256
+
+
+class Outbox:
+    """
+    Fila de saída de uma conexão WebSocket.
+
+    Attributes:
+        websocket: Conexão de destino
+        lanes: Uma fila por Priority, indexada pelo valor da prioridade
+            (None enquanto a lane não tem mensagens)
+        dropped: Mensagens descartadas por excesso de fila
+    """
+
+    __slots__ = (
+        "websocket",
+        "lanes",
+        "dropped",
+        "_on_error",
+        "_weights",
+        "_credits",
+        "_max_lane_size",
+        "_max_control_size",
+        "_counters",
+        "_writer",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_error: Callable[[WebSocket], None],
+        weights: Tuple[int, ...] = DEFAULT_WEIGHTS,
+        max_lane_size: int = DEFAULT_MAX_LANE_SIZE,
+        counters: Optional[TrafficCounters] = None,
+        max_control_size: int = DEFAULT_MAX_CONTROL_SIZE,
+    ):
+        """
+        Args:
+            websocket: Conexão de destino
+            on_error: Chamado com o websocket quando um envio falha
+            weights: Peso de cada lane no round-robin ponderado
+            max_lane_size: Limite das lanes realtime e bulk
+            max_control_size: Limite da lane de controle            counters: Contadores de tráfego e de filas, atualizados pela Outbox (opcional)
+        """
+        self.websocket = websocket
+        self.lanes: List[Optional[Deque[str]]] = [None] * len(Priority)
+        self.dropped = 0
+        self._on_error = on_error
+        self._weights = weights
+        # Créditos do ciclo atual do round-robin, alocados apenas pelo writer
+        self._credits: Optional[List[int]] = None
+        self._max_lane_size = max_lane_size
+        self._max_control_size = max_control_size
+        self._counters = counters
+        self._writer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self.lanes if lane)
+
+    def memory_size(self) -> int:
+        """
+        Estimativa em bytes da memória mantida por esta Outbox.
+
+        Soma a estrutura (ver structure_size) e as mensagens enfileiradas. Não inclui
+        o WebSocket do Starlette nem a task do endpoint, que pertencem ao framework.
+        """
+        return self.structure_size() + sum(
+            sys.getsizeof(message) for lane in self.lanes if lane for message in lane
+        )
+
+    def structure_size(self) -> int:
+        """
+        Memória em bytes do objeto e das lanes alocadas, sem as mensagens.
+
+        Não percorre as filas: as mensagens são contabilizadas de forma
+        incremental em TrafficCounters.queued_bytes.
+        """
+        size = sys.getsizeof(self) + sys.getsizeof(self.lanes) + sys.getsizeof(self._credits)
+        for lane in self.lanes:
+            if lane is not None:
+                size += sys.getsizeof(lane)
+        return size
+
+    @classmethod
+    def idle_memory_size(cls) -> int:
+        """
+        Memória em bytes de uma Outbox ociosa (lanes não alocadas).
+
+        Constante para todas as instâncias, permite contabilizar conexões
+        ociosas sem percorrê-las.
+        """
+        return (
+            sys.getsizeof(object.__new__(cls))
+            + sys.getsizeof([None] * len(Priority))
+            + sys.getsizeof(None)
+        )
+
+    def put(self, message: str, priority: Priority = Priority.REALTIME) -> bool:
+        """
+        Enfileira uma mensagem e garante que há um writer ativo.
+
+        Args:
+            message: Mensagem já serializada
+            priority: Lane de destino
+
+        Returns:
+            bool: False se a lane de controle está cheia; a mensagem não é
+            enfileirada e cabe a quem chamou encerrar a conexão
+        """
+        counters = self._counters
+        lane = self.lanes[priority]
+        if lane is None:
+            lane = self.lanes[priority] = deque()
+        elif priority == Priority.CONTROL:
+            if len(lane) >= self._max_control_size:
+                return False
+        elif len(lane) >= self._max_lane_size:
+            dropped = lane.popleft()
+            self.dropped += 1
+            if counters is not None:
+                counters.dropped += 1
+                counters.queued -= 1
+                counters.queued_bytes -= sys.getsizeof(dropped)
+        lane.append(message)
+        if counters is not None:
+            counters.queued += 1
+            counters.queued_bytes += sys.getsizeof(message)
+            counters.backlogged.add(self)
+        self._ensure_writer()
+        return True
+
+    def _ensure_writer(self):
+        writer = self._writer
+        if writer is None or writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._run())
+
+    def _next(self) -> Optional[str]:
+        """
+        Escolhe a próxima mensagem pelo round-robin ponderado.
+
+        Returns:
+            Optional[str]: Próxima mensagem ou None se todas as lanes estão vazias
+        """
+        credits = self._credits
+        if credits is None:
+            credits = self._credits = list(self._weights)
+        for _ in range(2):
+            for priority, lane in enumerate(self.lanes):
+                if lane and credits[priority] > 0:
+                    credits[priority] -= 1
+                    message = lane.popleft()
+                    if self._counters is not None:
+                        self._counters.queued -= 1
+                        self._counters.queued_bytes -= sys.getsizeof(message)
+                    return message
+            # Nenhuma lane com fila tem crédito: inicia um novo ciclo
+            credits[:] = self._weights
+        return None
+
+    async def _run(self):
+        """
+        Writer da conexão: envia até esvaziar as lanes.
+        """
+        try:
+            while (message := self._next()) is not None:
+                await self.websocket.send_text(message)
+                if self._counters is not None:
+                    self._counters.record_out(len(message))
+            # Fila vazia: devolver a memória das lanes enquanto a conexão fica ociosa
+            self.clear()
+        except Exception as e:
+            logger.warning(f"Erro ao enviar mensagem para conexão: {e}")
+            self.clear()
+            self._on_error(self.websocket)
+
+    async def join(self):
+        """
+        Aguarda o writer esvaziar as lanes.
+
+        Retorna sem erro se o writer for interrompido (conexão encerrada pelo
+        cliente durante a espera); cancelar quem aguarda não interrompe o writer.
+        """
+        writer = self._writer
+        if writer is not None and not writer.done():
+            await asyncio.wait({writer})
+
+    def clear(self):
+        """
+        Descarta as mensagens pendentes e libera as lanes.
+        """
+        counters = self._counters
+        if counters is not None:
+            for lane in self.lanes:
+                if lane:
+                    counters.queued -= len(lane)
+                    counters.queued_bytes -= sum(sys.getsizeof(message) for message in lane)
+            counters.backlogged.discard(self)
+        for priority in range(len(self.lanes)):
+            self.lanes[priority] = None
+        self._credits = None
+
+    def close(self):
+        """
+        Descarta as mensagens pendentes e interrompe o writer.
+        """
+        self.clear()
+        writer = self._writer
+        self._writer = None
+        # O próprio writer chega aqui pelo on_error e apenas termina
+        if writer is not None and not writer.done() and writer is not asyncio.current_task():
+            writer.cancel()
@@ -0,0 +1,298 @@
+"""
+Scheduler - Fan-out de broadcasts com justiça entre publicadores
+
+Um broadcast enfileira a mensagem na Outbox de cada conexão do pool. Feito
+de uma vez, dentro da task do endpoint, esse laço é O(conexões) sem nenhum
+ponto de suspensão: com pools grandes cada publicação segura o event loop, e
+um publicador intenso atrasa os demais e os laços de recepção.
+
+O BroadcastScheduler centraliza as publicações de todos os publicadores e
+executa o fan-out em fatias.
+
+Decisões de design:
+- Uma fila de jobs por publicador e no máximo um job ativo por publicador:
+  um publicador intenso nunca tem dois jobs em execução ao mesmo tempo
+- Um job entra em execução na fatia seguinte à sua chegada (ou ao fim do job
+  anterior do mesmo publicador), sem esperar o fan-out dos outros jobs
+- Cada fatia atende o job do publicador menos atendido até agora (serviço
+  contado em conexões), junto com os jobs alinhados a ele (mesmo destino,
+  mesma posição), e soma no máximo slice_size envios, seguida de
+  asyncio.sleep(0): o tempo contínuo no event loop é limitado pela fatia,
+  não pelo tamanho do pool nem pelo número de publicadores. Publicadores
+  empatados se alternam fatia a fatia
+- Jobs que entram juntos permanecem alinhados: cada conexão recebe as
+  mensagens deles na mesma fatia e o writer da Outbox as drena de uma vez
+- Um publicador que volta a publicar depois de ocioso começa no máximo um
+  pool atrás do publicador menos atendido: um publicador leve conclui seu
+  job praticamente sem dividir o loop, enquanto um intenso, que acabou de
+  ser atendido, não acumula crédito entre um job e outro
+- Cada job é resolvido assim que suas fatias cobrem todo o seu destino: a
+  latência de um publicador leve não cresce com a fila do publicador intenso
+- O destino de um job é o pool no instante em que ele entra em execução. A
+  cópia do pool é compartilhada pelos jobs enquanto nenhuma conexão nova
+  entra; conexões que saem durante o fan-out são ignoradas
+- O worker é criado sob demanda e encerra quando não há jobs, como o writer
+  das Outboxes
+"""
+
+from collections import deque
+from typing import Deque, Dict, Hashable, List, Optional
+import asyncio
+import logging
+
+from fastapi import WebSocket
+
+from metrics import StageTimer
+from outbound import Priority
+
+logger = logging.getLogger(__name__)
+
+# Envios (conexão x mensagem) por fatia antes de devolver o controle ao event loop
+DEFAULT_SLICE_SIZE = 512
+
+
+class PublishJob:
+    """
+    Um broadcast aguardando ou em execução no scheduler.
+
+    Attributes:
+        message: Mensagem já serializada
+        sender: Conexão do remetente, excluída do fan-out
+        priority: Lane usada na fila de saída de cada conexão
+        timer: Marcas de tempo da publicação (recebe o estágio "scheduled")
+        publisher: Chave do publicador no round-robin
+        targets: Conexões de destino, definidas quando o job entra em execução
+        position: Conexões de targets já percorridas
+        recipients: Conexões para as quais a mensagem já foi enfileirada
+        done: Resolvido com recipients ao fim do fan-out
+    """
+
+    __slots__ = ("message", "sender", "priority", "timer", "publisher", "targets", "position", "recipients", "done")
+
+    def __init__(
+        self,
+        message: str,
+        sender: Optional[WebSocket],
+        priority: Priority,
+        timer: Optional[StageTimer],
+        publisher: Hashable,
+        done: asyncio.Future,
+    ):
+        self.message = message
+        self.sender = sender
+        self.priority = priority
+        self.timer = timer
+        self.publisher = publisher
+        self.targets: List[WebSocket] = []
+        self.position = 0
+        self.recipients = 0
+        self.done = done
+
+
+class BroadcastScheduler:
+    """
+    Executa os broadcasts de todos os publicadores em fatias.
+
+    Attributes:
+        manager: ConnectionManager cujo pool recebe os broadcasts
+        slice_size: Conexões por fatia
+        completed: Jobs concluídos desde o início do processo
+        slices: Fatias executadas desde o início do processo
+    """
+
+    def __init__(self, manager, slice_size: int = DEFAULT_SLICE_SIZE):
+        """
+        Args:
+            manager: ConnectionManager cujo pool recebe os broadcasts
+            slice_size: Conexões por fatia
+        """
+        self.manager = manager
+        self.slice_size = slice_size
+        self.completed = 0
+        self.slices = 0
+        # Publicador -> conexões atendidas. Mantido após o publicador ficar
+        # ocioso para que um intenso não ganhe crédito entre jobs; entradas
+        # sem efeito (abaixo do piso de quem volta) são descartadas
+        self._served: Dict[Hashable, int] = {}
+        # Maior serviço já atingido por um publicador, referência do piso
+        # (None até a primeira fatia)
+        self._virtual: Optional[int] = None
+        # Publicador -> jobs pendentes, em ordem de chegada. A chave permanece
+        # enquanto o publicador tem um job ativo, mesmo com a fila vazia
+        self._queues: Dict[Hashable, Deque[PublishJob]] = {}
+        # Publicadores com jobs pendentes e nenhum job ativo, em ordem de chegada
+        self._ready: Deque[Hashable] = deque()
+        # Jobs em execução, no máximo um por publicador
+        self._active: List[PublishJob] = []
+        # Cópia do pool compartilhada pelos jobs e a versão do pool em que foi feita
+        self._targets: List[WebSocket] = []
+        self._targets_version: Optional[int] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        Quantidade de jobs aguardando ou em execução.
+        """
+        return len(self._active) + sum(len(jobs) for jobs in self._queues.values())
+
+    def submit(
+        self,
+        message: str,
+        sender: Optional[WebSocket] = None,
+        priority: Priority = Priority.REALTIME,
+        publisher: Optional[Hashable] = None,
+        timer: Optional[StageTimer] = None,
+    ) -> asyncio.Future:
+        """
+        Agenda um broadcast.
+
+        Args:
+            message: Mensagem em formato JSON string
+            sender: Conexão do remetente, que não recebe a mensagem
+            priority: Lane usada na fila de saída de cada conexão
+            publisher: Chave de justiça do round-robin (padrão: o próprio sender)
+            timer: Marcas de tempo; o estágio "scheduled" é marcado quando o job entra em execução
+
+        Returns:
+            asyncio.Future: Resolvido com a quantidade de destinatários ao fim do fan-out
+        """
+        loop = asyncio.get_running_loop()
+        key = sender if publisher is None else publisher
+        job = PublishJob(message, sender, priority, timer, key, loop.create_future())
+
+        jobs = self._queues.get(key)
+        if jobs is None:
+            jobs = self._queues[key] = deque()
+            self._ready.append(key)
+        jobs.append(job)
+
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+        return job.done
+
+    def _activate(self):
+        """
+        Coloca em execução o job mais antigo de cada publicador sem job ativo.
+        """
+        ready = self._ready
+        while ready:
+            key = ready.popleft()
+            job = self._queues[key].popleft()
+            if job.timer is not None:
+                job.timer.mark("scheduled")
+            version = self.manager.pool_version
+            if version != self._targets_version:
+                self._targets = list(self.manager.active_connections)
+                self._targets_version = version
+            job.targets = self._targets
+            floor = self._floor()
+            self._served[key] = max(self._served.get(key, floor), floor)
+            self._active.append(job)
+
+    def _floor(self) -> int:
+        """
+        Serviço mínimo de um publicador que entra em execução: um pool atrás
+        do publicador mais atendido.
+        """
+        if self._virtual is None:
+            return 0
+        return self._virtual - len(self._targets)
+
+    def _prune(self):
+        """
+        Descarta o histórico de publicadores ociosos que já está abaixo do piso.
+        """
+        floor = self._floor()
+        self._served = {
+            key: served for key, served in self._served.items()
+            if key in self._queues or served > floor
+        }
+
+    def _finish(self, job: PublishJob, error: Optional[Exception] = None):
+        """
+        Resolve o job e libera o próximo job do mesmo publicador.
+        """
+        self._active.remove(job)
+        job.targets = []
+        self.completed += 1
+        if self._awaited(job):
+            if error is None:
+                job.done.set_result(job.recipients)
+            else:
+                job.done.set_exception(error)
+
+        jobs = self._queues[job.publisher]
+        if jobs:
+            self._ready.append(job.publisher)
+        else:
+            del self._queues[job.publisher]
+            if len(self._served) > 2 * len(self._queues) + 64:
+                self._prune()
+
+    @staticmethod
+    def _awaited(job: PublishJob) -> bool:
+        """
+        Indica se ainda há quem aguarde o resultado do job.
+
+        Publicador cancelado (conexão encerrada) não recebe resultado.
+        """
+        return not job.done.done()
+
+    async def _run(self):
+        """
+        Worker: executa fatias até não restarem jobs.
+        """
+        while self._ready or self._active:
+            self._activate()
+            served = self._served
+            # min mantém a ordem de chegada entre publicadores empatados
+            job = min(self._active, key=lambda active: served[active.publisher])
+            # Jobs alinhados (mesma cópia do pool, mesma posição) avançam
+            # juntos: cada conexão da fatia recebe todas as mensagens de uma
+            # vez, e o writer da Outbox as drena numa única passada
+            group = [job] + [
+                other for other in self._active
+                if other is not job and other.targets is job.targets and other.position == job.position
+            ][:self.slice_size - 1]
+            chunk = job.targets[job.position:job.position + max(1, self.slice_size // len(group))]
+            for member in group:
+                # O grupo vai para o fim para alternar com os demais publicadores
+                self._active.remove(member)
+                self._active.append(member)
+                try:
+                    member.position += len(chunk)
+                    served[member.publisher] += len(chunk)
+                    if self._virtual is None or served[member.publisher] > self._virtual:
+                        self._virtual = served[member.publisher]
+                    member.recipients += self.manager.fan_out(chunk, member.message, member.sender, member.priority)
+                except Exception as e:
+                    logger.error(f"Erro no fan-out de broadcast: {e}")
+                    self._finish(member, e)
+                else:
+                    if member.position >= len(member.targets):
+                        self._finish(member)
+            self.slices += 1
+            # Fim da fatia: laços de recepção e writers rodam antes da próxima
+            await asyncio.sleep(0)
+
+    async def join(self):
+        """
+        Aguarda o fim de todos os jobs agendados.
+        """
+        worker = self._worker
+        if worker is not None and not worker.done():
+            await asyncio.shield(worker)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: jobs pendentes, publicadores com jobs, jobs concluídos e
+            fatias executadas
+        """
+        return {
+            "pending_jobs": self.pending,
+            "publishers": len(self._queues),
+            "completed": self.completed,
+            "slices": self.slices,
+        }
@@ -0,0 +1,432 @@
+"""
+Launcher de produção do WebSocket Broadcast Server
+
+Substitui o runner de desenvolvimento (uvicorn com reload=True) por um servidor
+preparado para deploys sem downtime.
+
+Decisões arquiteturais:
+- O socket de escuta é criado com SO_REUSEPORT, permitindo que o processo novo
+  faça bind na mesma porta enquanto o antigo ainda está em execução
+- Ao receber SIGTERM/SIGINT o processo entra em modo drain: deixa de aceitar
+  conexões, conclui os envios pendentes e migra os clientes em lotes, com uma
+  dica de reconexão, antes de encerrar
+- Toda a configuração é feita por variáveis de ambiente (12-factor)
+- Event loop e parser HTTP são escolhidos explicitamente (uvloop/httptools
+  quando disponíveis) em vez de depender do "auto" do uvicorn
+- Com WORKERS > 1 cada worker abre o próprio socket com SO_REUSEPORT e o
+  kernel distribui as conexões. O pool de conexões é por processo: um
+  broadcast só alcança os clientes do mesmo worker, por isso WORKERS > 1
+  exige ALLOW_SPLIT_BROADCAST=1
+- O supervisor reinicia workers que morrem; se um worker morre logo após
+  iniciar (erro de configuração, porta ocupada) o supervisor encerra os
+  demais e sai com código diferente de zero
+
+Sequência de deploy:
+1. Subir o processo novo (mesma porta, SO_REUSEPORT)
+2. Enviar SIGTERM ao processo antigo
+3. O processo antigo fecha o listener e migra os clientes escalonadamente
+"""
+
+from dataclasses import dataclass
+import importlib.util
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# Worker que morre antes deste tempo (s) falhou na inicialização: reiniciá-lo
+# apenas repetiria a falha
+WORKER_MIN_UPTIME = 5.0
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_optional_float(name: str, default: Optional[float]) -> Optional[float]:
+    # "0" ou "none" desabilitam o recurso (ex.: ping do WebSocket)
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    if value.lower() == "none" or float(value) == 0:
+        return None
+    return float(value)
+
+
+def _is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def resolve_loop(loop: str) -> str:
+    """
+    Resolve o event loop a ser usado pelo uvicorn.
+
+    Args:
+        loop: "auto", "uvloop" ou "asyncio"
+
+    Returns:
+        str: "uvloop" ou "asyncio"
+
+    Raises:
+        RuntimeError: Se uvloop foi pedido explicitamente e não está instalado
+    """
+    if loop == "auto":
+        return "uvloop" if _is_installed("uvloop") else "asyncio"
+    if loop == "uvloop" and not _is_installed("uvloop"):
+        raise RuntimeError("LOOP=uvloop, mas o pacote uvloop não está instalado")
+    if loop not in ("uvloop", "asyncio"):
+        raise RuntimeError(f"LOOP inválido: {loop}")
+    return loop
+
+
+def resolve_http(http: str) -> str:
+    """
+    Resolve o parser HTTP a ser usado pelo uvicorn.
+
+    Args:
+        http: "auto", "httptools" ou "h11"
+
+    Returns:
+        str: "httptools" ou "h11"
+
+    Raises:
+        RuntimeError: Se httptools foi pedido explicitamente e não está instalado
+    """
+    if http == "auto":
+        return "httptools" if _is_installed("httptools") else "h11"
+    if http == "httptools" and not _is_installed("httptools"):
+        raise RuntimeError("HTTP=httptools, mas o pacote httptools não está instalado")
+    if http not in ("httptools", "h11"):
+        raise RuntimeError(f"HTTP inválido: {http}")
+    return http
+
+
+@dataclass
+class ServerSettings:
+    """
+    Configuração do servidor lida das variáveis de ambiente.
+
+    Attributes:
+        host: Interface de escuta (HOST)
+        port: Porta de escuta (PORT)
+        log_level: Nível de log do uvicorn (LOG_LEVEL)
+        workers: Quantidade de processos worker (WORKERS)
+        allow_split_broadcast: Permite WORKERS > 1 mesmo com cada worker
+            alcançando apenas os próprios clientes (ALLOW_SPLIT_BROADCAST)
+        loop: Event loop: auto, uvloop ou asyncio (LOOP)
+        http: Parser HTTP: auto, httptools ou h11 (HTTP)
+        backlog: Tamanho da fila de conexões pendentes do listen (BACKLOG)
+        timeout_keep_alive: Segundos de keep-alive HTTP ocioso (TIMEOUT_KEEP_ALIVE)
+        ws_max_size: Tamanho máximo de uma mensagem WebSocket em bytes (WS_MAX_SIZE)
+        ws_max_queue: Mensagens recebidas enfileiradas por conexão (WS_MAX_QUEUE)
+        ws_ping_interval: Intervalo de ping em segundos, 0 desabilita (WS_PING_INTERVAL)
+        ws_ping_timeout: Timeout do pong em segundos, 0 desabilita (WS_PING_TIMEOUT)
+        ws_per_message_deflate: Compressão permessage-deflate (WS_PER_MESSAGE_DEFLATE)
+        drain_batch_size: Conexões migradas por lote (DRAIN_BATCH_SIZE)
+        drain_batch_interval: Intervalo entre lotes em segundos (DRAIN_BATCH_INTERVAL)
+        drain_reconnect_jitter_ms: Atraso máximo de reconexão sugerido (DRAIN_RECONNECT_JITTER_MS)
+        drain_flush_timeout: Tempo máximo para concluir envios pendentes e, por
+            conexão, para entregar a dica de reconexão (DRAIN_FLUSH_TIMEOUT)
+        drain_timeout: Prazo total do drain; esgotado, as conexões restantes são
+            fechadas de uma vez (DRAIN_TIMEOUT)
+        graceful_timeout: Tempo máximo do shutdown após o drain (GRACEFUL_TIMEOUT)
+    """
+    host: str = "0.0.0.0"
+    port: int = 8000
+    log_level: str = "info"
+    workers: int = 1
+    allow_split_broadcast: bool = False
+    loop: str = "auto"
+    http: str = "auto"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    ws_max_size: int = 64 * 1024
+    ws_max_queue: int = 32
+    ws_ping_interval: Optional[float] = 20.0
+    ws_ping_timeout: Optional[float] = 20.0
+    ws_per_message_deflate: bool = False
+    drain_batch_size: int = 100
+    drain_batch_interval: float = 0.5
+    drain_reconnect_jitter_ms: int = 2000
+    drain_flush_timeout: float = 5.0
+    # DRAIN_TIMEOUT + GRACEFUL_TIMEOUT deve ficar abaixo do prazo do orquestrador
+    # até o SIGKILL (stop_grace_period do compose: 30s)
+    drain_timeout: float = 15.0
+    graceful_timeout: int = 10
+
+    @classmethod
+    def from_env(cls) -> "ServerSettings":
+        """
+        Cria a configuração a partir das variáveis de ambiente.
+
+        Variáveis ausentes ou vazias mantêm o valor padrão.
+        """
+        return cls(
+            host=os.environ.get("HOST", cls.host),
+            port=_env_int("PORT", cls.port),
+            log_level=os.environ.get("LOG_LEVEL", cls.log_level),
+            workers=_env_int("WORKERS", cls.workers),
+            allow_split_broadcast=_env_bool("ALLOW_SPLIT_BROADCAST", cls.allow_split_broadcast),
+            loop=os.environ.get("LOOP", cls.loop),
+            http=os.environ.get("HTTP", cls.http),
+            backlog=_env_int("BACKLOG", cls.backlog),
+            timeout_keep_alive=_env_int("TIMEOUT_KEEP_ALIVE", cls.timeout_keep_alive),
+            ws_max_size=_env_int("WS_MAX_SIZE", cls.ws_max_size),
+            ws_max_queue=_env_int("WS_MAX_QUEUE", cls.ws_max_queue),
+            ws_ping_interval=_env_optional_float("WS_PING_INTERVAL", cls.ws_ping_interval),
+            ws_ping_timeout=_env_optional_float("WS_PING_TIMEOUT", cls.ws_ping_timeout),
+            ws_per_message_deflate=_env_bool("WS_PER_MESSAGE_DEFLATE", cls.ws_per_message_deflate),
+            drain_batch_size=_env_int("DRAIN_BATCH_SIZE", cls.drain_batch_size),
+            drain_batch_interval=_env_float("DRAIN_BATCH_INTERVAL", cls.drain_batch_interval),
+            drain_reconnect_jitter_ms=_env_int("DRAIN_RECONNECT_JITTER_MS", cls.drain_reconnect_jitter_ms),
+            drain_flush_timeout=_env_float("DRAIN_FLUSH_TIMEOUT", cls.drain_flush_timeout),
+            drain_timeout=_env_float("DRAIN_TIMEOUT", cls.drain_timeout),
+            graceful_timeout=_env_int("GRACEFUL_TIMEOUT", cls.graceful_timeout),
+        )
+
+
+def create_listen_socket(host: str, port: int) -> socket.socket:
+    """
+    Cria o socket de escuta compartilhável entre processos.
+
+    Com SO_REUSEPORT o kernel permite que vários processos façam bind na mesma
+    porta e distribui as novas conexões entre eles. É o que permite ao processo
+    novo assumir a porta antes do antigo encerrar.
+
+    Args:
+        host: Interface de escuta
+        port: Porta de escuta
+
+    Returns:
+        socket.socket: Socket já vinculado (o listen é feito pelo uvicorn)
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, "SO_REUSEPORT"):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    else:  # pragma: no cover - plataformas sem SO_REUSEPORT (Windows)
+        logger.warning("SO_REUSEPORT indisponível: restart sem downtime desabilitado")
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    Servidor uvicorn que executa o drain das conexões WebSocket no shutdown.
+
+    O shutdown padrão do uvicorn fecha todas as conexões de uma vez, o que faz
+    todos os clientes reconectarem simultaneamente. Aqui o listener é fechado
+    primeiro e o ConnectionManager migra os clientes em lotes antes do shutdown
+    padrão prosseguir.
+    """
+
+    def __init__(self, config: uvicorn.Config, manager, settings: ServerSettings):
+        super().__init__(config)
+        self.manager = manager
+        self.settings = settings
+
+    async def shutdown(self, sockets=None):
+        # Parar de aceitar conexões: a partir daqui o kernel entrega
+        # novas conexões apenas ao processo que também escuta a porta
+        for server in self.servers:
+            server.close()
+        for sock in sockets or []:
+            sock.close()
+
+        await self.manager.drain(
+            batch_size=self.settings.drain_batch_size,
+            batch_interval=self.settings.drain_batch_interval,
+            reconnect_jitter_ms=self.settings.drain_reconnect_jitter_ms,
+            flush_timeout=self.settings.drain_flush_timeout,
+            timeout=self.settings.drain_timeout,
+        )
+
+        await super().shutdown(sockets=sockets)
+
+
+def build_config(app, settings: ServerSettings) -> uvicorn.Config:
+    """
+    Monta a configuração do uvicorn a partir das settings.
+
+    Args:
+        app: Aplicação ASGI
+        settings: Configuração lida do ambiente
+
+    Returns:
+        uvicorn.Config: Configuração pronta para o DrainingServer
+    """
+    return uvicorn.Config(
+        app,
+        loop=resolve_loop(settings.loop),
+        http=resolve_http(settings.http),
+        ws="websockets",
+        log_level=settings.log_level,
+        backlog=settings.backlog,
+        timeout_keep_alive=settings.timeout_keep_alive,
+        ws_max_size=settings.ws_max_size,
+        ws_max_queue=settings.ws_max_queue,
+        ws_ping_interval=settings.ws_ping_interval,
+        ws_ping_timeout=settings.ws_ping_timeout,
+        ws_per_message_deflate=settings.ws_per_message_deflate,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+    )
+
+
+def run_worker(settings: ServerSettings):
+    """
+    Executa um processo servidor com drain no shutdown.
+
+    Cada worker cria o próprio socket com SO_REUSEPORT; o kernel distribui as
+    conexões entre os workers que escutam a porta.
+
+    Args:
+        settings: Configuração lida do ambiente
+    """
+    from main import app, manager
+
+    sock = create_listen_socket(settings.host, settings.port)
+    config = build_config(app, settings)
+    server = DrainingServer(config, manager=manager, settings=settings)
+    logger.info(
+        f"Worker {os.getpid()} escutando em {settings.host}:{settings.port} "
+        f"(loop={config.loop}, http={config.http})"
+    )
+    server.run(sockets=[sock])
+
+
+def supervise(
+    settings: ServerSettings,
+    target: Callable[..., None] = run_worker,
+    args: Optional[Tuple] = None,
+) -> int:
+    """
+    Inicia os workers, reinicia os que morrem e repassa SIGTERM/SIGINT para
+    que cada um faça o drain.
+
+    Os handlers de sinal são instalados antes do primeiro start: um sinal
+    recebido durante a inicialização não deixa workers órfãos.
+
+    Args:
+        settings: Configuração lida do ambiente
+        target: Função executada em cada worker
+        args: Argumentos de target (padrão: as settings)
+
+    Returns:
+        int: Código de saída do supervisor, 0 apenas se todos os workers
+        encerraram sem erro após o sinal de parada
+
+    Raises:
+        RuntimeError: Se WORKERS > 1 sem ALLOW_SPLIT_BROADCAST
+    """
+    if settings.workers > 1 and not settings.allow_split_broadcast:
+        raise RuntimeError(
+            f"WORKERS={settings.workers} divide o broadcast: cada worker só alcança os "
+            "próprios clientes. Defina ALLOW_SPLIT_BROADCAST=1 para aceitar"
+        )
+
+    context = multiprocessing.get_context("spawn")
+    args = (settings,) if args is None else args
+    workers: Dict[int, multiprocessing.process.BaseProcess] = {}
+    started_at: Dict[int, float] = {}
+    stopping = False
+
+    def forward_signal(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for process in workers.values():
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    def start(index: int):
+        process = context.Process(target=target, args=args, name=f"worker-{index}")
+        process.start()
+        workers[index] = process
+        started_at[index] = time.monotonic()
+
+    previous = {
+        signum: signal.signal(signum, forward_signal)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    failed = False
+    try:
+        for index in range(settings.workers):
+            if stopping:
+                break
+            start(index)
+
+        if settings.workers > 1:
+            logger.warning(
+                f"{settings.workers} workers iniciados: o pool de conexões é por processo, "
+                "broadcasts não atravessam workers"
+            )
+
+        while True:
+            alive = [process for process in workers.values() if process.is_alive()]
+            if (stopping or failed) and not alive:
+                break
+            multiprocessing.connection.wait([process.sentinel for process in alive], timeout=1.0)
+            if stopping or failed:
+                continue
+
+            for index, process in list(workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                logger.error(f"Worker {process.name} (pid {process.pid}) encerrou com código {process.exitcode}")
+                if time.monotonic() - started_at[index] < WORKER_MIN_UPTIME:
+                    logger.error(f"Worker {process.name} falhou na inicialização, encerrando os demais")
+                    failed = True
+                    for other in workers.values():
+                        if other.is_alive():
+                            os.kill(other.pid, signal.SIGTERM)
+                    break
+                logger.warning(f"Reiniciando {process.name}")
+                start(index)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+    if failed or any(process.exitcode != 0 for process in workers.values()):
+        return 1
+    return 0
+
+
+def main():
+    """
+    Ponto de entrada de produção: python server.py
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    settings = ServerSettings.from_env()
+
+    if settings.workers > 1:
+        sys.exit(supervise(settings))
+    else:
+        run_worker(settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Stats - Agregador de estatísticas do servidor para dashboards
+
+Publica periodicamente um snapshot das estatísticas do processo para os
+clientes conectados em /ws/stats, para que dashboards não precisem fazer
+polling em /health.
+
+Decisões de design:
+- O snapshot é calculado e serializado uma única vez por tick e o mesmo
+  texto é enfileirado para todos os viewers: o custo não cresce com o número
+  de dashboards abertos
+- Taxas (mensagens/s, bytes/s) vêm de uma janela deslizante de amostras dos
+  contadores cumulativos, o que suaviza picos de um único tick
+- Cada viewer recebe pela própria Outbox com lane curta: um dashboard lento
+  recebe apenas os snapshots mais recentes, sem acumular fila
+- A task de tick só existe enquanto houver viewers conectados. Ela não é
+  cancelada: sem viewers termina no tick seguinte, e um viewer que chega
+  nesse meio-tempo continua atendido pela mesma task
+- Consultas avulsas (GET /stats) não registram amostras: recebem o snapshot
+  do último tick ou, sem ticks ativos, taxas calculadas sobre uma cópia da
+  janela
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+
+from fastapi import WebSocket
+
+from dedup import DedupWindow
+from metrics import LatencyTracker, now
+from models import utc_now_iso
+from outbound import Outbox, Priority
+
+logger = logging.getLogger(__name__)
+
+# Snapshots pendentes por viewer antes de descartar o mais antigo
+VIEWER_MAX_PENDING = 2
+
+
+class StatsAggregator:
+    """
+    Calcula e distribui snapshots das estatísticas do servidor.
+
+    Attributes:
+        viewers: Conexões /ws/stats ativas e suas filas de saída
+        interval: Intervalo entre ticks em segundos
+        last_payload: Último snapshot serializado
+        loop_lag_ms: Atraso do último tick em relação ao agendado
+    """
+
+    def __init__(
+        self,
+        manager,
+        latency_tracker: LatencyTracker,
+        interval: float = 1.0,
+        window: int = 10,
+        dedup_window: Optional[DedupWindow] = None,
+    ):
+        """
+        Args:
+            manager: ConnectionManager cujas conexões e contadores são observados
+            latency_tracker: Latências por estágio do pipeline de publicação
+            interval: Intervalo entre ticks em segundos
+            window: Quantidade de amostras usadas no cálculo das taxas
+            dedup_window: Janela de idempotência cujas métricas entram no snapshot
+        """
+        self.manager = manager
+        self.latency_tracker = latency_tracker
+        self.dedup_window = dedup_window
+        self.interval = interval
+        self.viewers: Dict[WebSocket, Outbox] = {}
+        self.last_payload: Optional[str] = None
+        self.loop_lag_ms = 0.0
+        # (instante, totais dos contadores); window + 1 amostras geram window intervalos
+        self._history: Deque[Tuple[float, Tuple[int, ...]]] = deque(maxlen=window + 1)
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, websocket: WebSocket):
+        """
+        Registra um viewer e garante que a task de tick está ativa.
+
+        O último snapshot, se houver, é enviado imediatamente.
+
+        Args:
+            websocket: Conexão /ws/stats já aceita
+        """
+        outbox = Outbox(websocket, on_error=self.unsubscribe, max_lane_size=VIEWER_MAX_PENDING)
+        self.viewers[websocket] = outbox
+        if self.last_payload is not None:
+            outbox.put(self.last_payload, Priority.REALTIME)
+
+        if not self.ticking:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Viewer de estatísticas conectado. Total de viewers: {len(self.viewers)}")
+
+    def unsubscribe(self, websocket: WebSocket):
+        """
+        Remove um viewer. Sem viewers, a task de tick termina no próximo intervalo.
+
+        Args:
+            websocket: Conexão /ws/stats encerrada
+        """
+        outbox = self.viewers.pop(websocket, None)
+        if outbox is not None:
+            outbox.close()
+            logger.info(f"Viewer de estatísticas desconectado. Total de viewers: {len(self.viewers)}")
+
+    @property
+    def ticking(self) -> bool:
+        """
+        Indica se a task de tick está ativa.
+        """
+        return self._task is not None and not self._task.done()
+
+    def sample(self):
+        """
+        Registra uma amostra dos contadores cumulativos na janela.
+        """
+        self._history.append((now(), self.manager.counters.totals()))
+
+    def snapshot(self, live: bool = False) -> Dict[str, Any]:
+        """
+        Monta o snapshot a partir da janela de amostras e do estado atual.
+
+        Args:
+            live: Inclui uma amostra do instante atual no cálculo das taxas,
+                sem registrá-la na janela
+
+        Returns:
+            Dict[str, Any]: Estatísticas do processo prontas para serializar
+        """
+        history = list(self._history)
+        if live:
+            history.append((now(), self.manager.counters.totals()))
+            history = history[-self._history.maxlen:]
+
+        rates = (0.0, 0.0, 0.0, 0.0)
+        if len(history) >= 2:
+            (start, first), (end, last) = history[0], history[-1]
+            elapsed = end - start
+            if elapsed > 0:
+                rates = tuple(round((b - a) / elapsed, 2) for a, b in zip(first, last))
+
+        messages_in, bytes_in, messages_out, bytes_out = rates
+        snapshot = {
+            "type": "stats",
+            "timestamp": utc_now_iso(),
+            "connections": self.manager.get_connection_count(),
+            "stats_viewers": len(self.viewers),
+            "messages_in_per_s": messages_in,
+            "messages_out_per_s": messages_out,
+            "bytes_in_per_s": bytes_in,
+            "bytes_out_per_s": bytes_out,
+            "queue": self.manager.get_queue_stats(),
+            "scheduler": self.manager.scheduler.stats(),
+            "memory": self.manager.get_memory_stats(),
+            "latency_ms": self.latency_tracker.summary(),
+            "loop_lag_ms": self.loop_lag_ms,
+        }
+        if self.dedup_window is not None:
+            snapshot["dedup"] = self.dedup_window.stats()
+        return snapshot
+
+    def current(self) -> str:
+        """
+        Snapshot serializado para consultas avulsas (GET /stats).
+
+        Com viewers conectados devolve o payload do último tick, o mesmo
+        publicado em /ws/stats. Sem ticks ativos calcula um snapshot com a
+        amostra atual sobre uma cópia da janela. Em nenhum caso a janela
+        usada pelos ticks é alterada.
+
+        Returns:
+            str: Snapshot em JSON
+        """
+        if self.ticking and self.last_payload is not None:
+            return self.last_payload
+        return json.dumps(self.snapshot(live=True))
+
+    def tick(self, loop_lag: float = 0.0) -> str:
+        """
+        Executa um tick: amostra, calcula, serializa e distribui o snapshot.
+
+        Args:
+            loop_lag: Atraso do tick em relação ao agendado, em segundos
+
+        Returns:
+            str: Snapshot serializado enviado aos viewers
+        """
+        self.loop_lag_ms = round(max(0.0, loop_lag) * 1000, 3)
+        self.sample()
+        payload = json.dumps(self.snapshot())
+        self.last_payload = payload
+        for outbox in list(self.viewers.values()):
+            outbox.put(payload, Priority.REALTIME)
+        return payload
+
+    async def _run(self):
+        """
+        Task de tick: mede o atraso do event loop a cada intervalo.
+
+        O atraso é a diferença entre o instante em que o tick deveria
+        acordar e o instante em que de fato acordou.
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        # Amostras de um período sem viewers distorceriam as taxas
+        self._history.clear()
+        self.sample()
+        while self.viewers:
+            next_tick += self.interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            if not self.viewers:
+                break
+            woke = loop.time()
+            lag = woke - next_tick
+            # Após um atraso maior que o intervalo, realinhar em vez de disparar ticks em rajada
+            if lag > self.interval:
+                next_tick = woke
+            self.tick(loop_lag=lag)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark de justiça do fan-out: publicadores intensos x leves
+
+Monta um ConnectionManager com N assinantes em memória (SimulatedSocket do
+harness, sem latência de rede) e roda, ao mesmo tempo:
+- publicadores intensos, que publicam sem pausa
+- publicadores leves, que publicam a cada --light-interval segundos
+- uma sonda que mede o atraso do event loop (sleep de 1 ms)
+
+Cada modo é medido separadamente:
+- inline: fan-out de uma vez na task do publicador (manager.broadcast)
+- scheduler: fan-out em fatias com round-robin (manager.publish)
+
+Reporta a latência de publicação dos publicadores leves (instante agendado
+-> fan-out concluído) e o atraso do event loop. Com o scheduler o atraso máximo fica
+limitado pela fatia, não pelo tamanho do pool.
+
+Uso:
+    python benchmarks/bench_fairness.py --subscribers 20000 --heavy 4 --light 4 --duration 5
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from connection_manager import ConnectionManager  # noqa: E402
+from harness import SimulatedSocket  # noqa: E402
+from metrics import summarize  # noqa: E402
+from scheduler import DEFAULT_SLICE_SIZE  # noqa: E402
+
+
+async def run_mode(mode: str, args) -> dict:
+    manager = ConnectionManager(slice_size=args.slice_size)
+    for _ in range(args.subscribers):
+        await manager.connect(SimulatedSocket())
+    heavy_sockets = [SimulatedSocket() for _ in range(args.heavy)]
+    light_sockets = [SimulatedSocket() for _ in range(args.light)]
+
+    async def publish(sender, message):
+        if mode == "inline":
+            return await manager.broadcast(message, sender=sender)
+        return await manager.publish(message, sender=sender)
+
+    deadline = time.perf_counter() + args.duration
+    light_latencies = []
+    loop_lags = []
+    heavy_published = 0
+
+    async def heavy(sender):
+        nonlocal heavy_published
+        while time.perf_counter() < deadline:
+            await publish(sender, '{"message": "heavy"}')
+            heavy_published += 1
+            # Equivale ao receive_text do endpoint entre mensagens
+            await asyncio.sleep(0)
+
+    async def light(sender):
+        # Latência medida a partir do instante agendado da publicação, o que
+        # inclui o tempo esperando o event loop liberar a task
+        scheduled = time.perf_counter()
+        while scheduled < deadline:
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await publish(sender, '{"message": "light"}')
+            finished = time.perf_counter()
+            light_latencies.append((finished - scheduled) * 1000)
+            scheduled = max(scheduled + args.light_interval, finished)
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            loop_lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+    logging.disable(logging.INFO)
+    gc.collect()
+    await asyncio.gather(
+        *(heavy(ws) for ws in heavy_sockets),
+        *(light(ws) for ws in light_sockets),
+        probe(),
+    )
+    await manager.flush(timeout=30)
+
+    return {
+        "heavy_per_s": heavy_published / args.duration,
+        "light": summarize(light_latencies),
+        "lag": summarize(loop_lags),
+    }
+
+
+def report(mode: str, result: dict):
+    light, lag = result["light"], result["lag"]
+    print(f"\n[{mode}]")
+    print(f"  Publicações intensas/s:    {result['heavy_per_s']:,.1f}")
+    print(
+        f"  Latência leve (ms):        p50 {light['p50']:.2f}  p99 {light['p99']:.2f}  "
+        f"max {light['max']:.2f}  (n={light['count']})"
+    )
+    print(f"  Atraso do event loop (ms): p50 {lag['p50']:.2f}  p99 {lag['p99']:.2f}  max {lag['max']:.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=20_000, help="Assinantes no pool")
+    parser.add_argument("--heavy", type=int, default=4, help="Publicadores intensos")
+    parser.add_argument("--light", type=int, default=4, help="Publicadores leves")
+    parser.add_argument("--light-interval", type=float, default=0.05, help="Intervalo dos publicadores leves (s)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Duração de cada modo (s)")
+    parser.add_argument("--slice-size", type=int, default=DEFAULT_SLICE_SIZE, help="Conexões por fatia do scheduler")
+    parser.add_argument("--mode", choices=("inline", "scheduler", "both"), default="both")
+    args = parser.parse_args()
+
+    print(
+        f"{args.subscribers:,} assinantes, {args.heavy} publicadores intensos, "
+        f"{args.light} leves, {args.duration:.0f}s por modo"
+    )
+    modes = ("inline", "scheduler") if args.mode == "both" else (args.mode,)
+    for mode in modes:
+        report(mode, await run_mode(mode, args))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
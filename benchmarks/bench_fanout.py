@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark do caminho de publicação com consumidores lentos e falhas
+
+Conecta N clientes simulados (harness.py) diretamente à aplicação ASGI e faz
+um deles publicar M mensagens em /ws/events. O caminho inteiro é exercitado
+em memória: handshake, validação, serialização, scheduler de broadcast,
+Outboxes e writers. Parte dos clientes recebe com latência e banda
+limitadas, e parte tem a conexão derrubada após algumas mensagens.
+
+Reporta o throughput de publicação (até o último ack), o throughput de
+entrega (até esvaziar as filas), mensagens descartadas por fila cheia,
+clientes derrubados e as latências por estágio do pipeline. Com --profile o
+trecho medido é perfilado (cProfile ou pyinstrument).
+
+Uso:
+    python benchmarks/bench_fanout.py --clients 2000 --messages 500 --slow-fraction 0.1 --profile cprofile
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from harness import ClientPool, LinkProfile, add_profiling_arguments, profiling  # noqa: E402
+from main import app, latency_tracker, manager  # noqa: E402
+
+
+def link_profiles(args):
+    """
+    Sorteia o papel de cada cliente (rápido, lento ou com falha) de forma reproduzível.
+
+    O cliente 0 é o publicador e nunca é lento nem falha.
+    """
+    rng = random.Random(args.seed)
+    fast = LinkProfile()
+    slow = LinkProfile(latency=args.slow_latency, bandwidth=args.slow_bandwidth)
+    failing = LinkProfile(fail_after=args.fail_after)
+    roles = [fast]
+    for _ in range(args.clients):
+        draw = rng.random()
+        if draw < args.fail_fraction:
+            roles.append(failing)
+        elif draw < args.fail_fraction + args.slow_fraction:
+            roles.append(slow)
+        else:
+            roles.append(fast)
+    return roles
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2_000, help="Assinantes (além do publicador)")
+    parser.add_argument("--messages", type=int, default=500, help="Mensagens publicadas")
+    parser.add_argument("--payload-size", type=int, default=200, help="Tamanho do campo message")
+    parser.add_argument("--priority", choices=("realtime", "bulk"), default="realtime")
+    parser.add_argument("--slow-fraction", type=float, default=0.1, help="Fração de clientes lentos")
+    parser.add_argument("--slow-latency", type=float, default=0.005, help="Atraso por mensagem dos lentos (s)")
+    parser.add_argument("--slow-bandwidth", type=float, default=None, help="Banda dos lentos (bytes/s)")
+    parser.add_argument("--fail-fraction", type=float, default=0.01, help="Fração de clientes que caem")
+    parser.add_argument("--fail-after", type=int, default=50, help="Mensagens até a queda")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Tempo máximo para esvaziar as filas (s)")
+    parser.add_argument("--seed", type=int, default=1, help="Semente do sorteio de papéis")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+
+    # Quedas injetadas geram um warning por conexão; não são erro do benchmark
+    logging.disable(logging.WARNING)
+    roles = link_profiles(args)
+    payload = "x" * args.payload_size
+
+    async with ClientPool(app, len(roles), link=lambda index: roles[index]) as pool:
+        publisher = pool.clients[0]
+        latency_tracker.reset()
+        dropped_before = manager.counters.dropped
+        gc.collect()
+
+        with profiling(args.profile, args.profile_output):
+            start = time.perf_counter()
+            for i in range(args.messages):
+                publisher.publish({"message": payload, "correlation_id": f"m-{i}", "priority": args.priority})
+            # Cada publicação gera um ack para o publicador
+            while publisher.link.delivered < args.messages:
+                await asyncio.sleep(0.001)
+            published = time.perf_counter() - start
+            flushed = await manager.flush(timeout=args.timeout)
+            drained = time.perf_counter() - start
+
+        deliveries = pool.delivered - publisher.link.delivered
+        expected = args.messages * args.clients
+        summary = latency_tracker.summary()
+
+    slow = sum(role.delay(args.payload_size) > 0 for role in roles)
+    failing = sum(role.fail_after is not None for role in roles)
+    print(f"Clientes:            {args.clients:,} ({slow} lentos, {failing} com falha)")
+    print(f"Publicação:          {args.messages / published:,.0f} msgs/s ({published:.2f}s até o último ack)")
+    print(f"Entrega:             {deliveries / drained:,.0f} msgs/s ({drained:.2f}s até esvaziar as filas"
+          f"{'' if flushed else ', tempo esgotado'})")
+    print(f"Entregues/esperadas: {deliveries:,} / {expected:,}")
+    print(f"Descartadas (fila):  {manager.counters.dropped - dropped_before:,}")
+    print(f"Clientes derrubados: {pool.failed()}")
+    for span, stats in summary.items():
+        print(f"  {span:<9} p50 {stats['p50']:8.3f} ms  p99 {stats['p99']:8.3f} ms  max {stats['max']:8.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
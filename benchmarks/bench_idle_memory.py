@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória: conexões ociosas em /ws/events
+
+Abre N conexões WebSocket ociosas diretamente contra a aplicação ASGI
+(backend/main.py), sem sockets reais: 100 mil sockets esbarrariam nos limites
+de file descriptors e mediriam o kernel, não o servidor. Cada conexão passa
+pelo handshake, entra no pool do ConnectionManager e fica bloqueada em
+receive_text, exatamente como um assinante real ocioso.
+
+Reporta o RSS adicional por conexão, a memória alocada por conexão pelos
+módulos do servidor e, para comparação, a estimativa do próprio
+ConnectionManager. Sai com código 1 se o RSS ou a memória alocada passar do
+seu limite. O RSS é dominado pelo framework (WebSocket do Starlette, task do
+endpoint), então só o limite da memória alocada pega regressões no
+ConnectionManager, na Outbox e no scheduler: hoje cerca de 340-380 bytes por
+conexão, contra cerca de 12,5 KB de RSS.
+
+A memória alocada é medida com tracemalloc, filtrada pelos arquivos desses
+módulos, e conta qualquer estrutura nova por conexão mesmo que a estimativa
+do manager não a liste. O tracemalloc infla o RSS, então essa medição roda
+num processo separado, com o mesmo número de conexões.
+
+Uso:
+    python benchmarks/bench_idle_memory.py --connections 100000 --max-bytes-per-conn 14000 \
+        --max-traced-bytes-per-conn 450
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict
+import argparse
+import asyncio
+import gc
+import logging
+import multiprocessing
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from harness import idle_connection  # noqa: E402
+from main import app, manager  # noqa: E402
+from metrics import current_rss  # noqa: E402
+
+
+# Módulos cujas alocações por conexão são limitadas pelo benchmark
+TRACED_FILES = ("connection_manager.py", "outbound.py", "scheduler.py")
+
+
+def traced_bytes() -> int:
+    """
+    Memória alocada pelos módulos do servidor que ainda está viva.
+    """
+    filters = [tracemalloc.Filter(True, f"*{name}") for name in TRACED_FILES]
+    snapshot = tracemalloc.take_snapshot().filter_traces(filters)
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+async def open_idle(connections: int, batch: int, traced: bool = False) -> Dict[str, Any]:
+    """
+    Abre as conexões ociosas em lotes e mede a memória antes e depois.
+
+    Args:
+        connections: Conexões ociosas abertas
+        batch: Conexões abertas por lote
+        traced: Mede com tracemalloc as alocações dos módulos do servidor
+            em vez do RSS
+
+    Returns:
+        Dict[str, Any]: conexões abertas, tempo de abertura, bytes por conexão
+        (RSS ou alocados) e a estimativa do manager
+    """
+    logging.disable(logging.INFO)
+    loop = asyncio.get_running_loop()
+    idle = loop.create_future()
+    accepted: asyncio.Queue = asyncio.Queue()
+
+    if traced:
+        tracemalloc.start()
+    gc.collect()
+    before = traced_bytes() if traced else current_rss()
+    start = time.perf_counter()
+
+    tasks = []
+    for first in range(0, connections, batch):
+        count = min(batch, connections - first)
+        tasks.extend(
+            loop.create_task(idle_connection(app, index, idle, accepted))
+            for index in range(first, first + count)
+        )
+        for _ in range(count):
+            await accepted.get()
+
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    after = traced_bytes() if traced else current_rss()
+    if traced:
+        tracemalloc.stop()
+
+    opened = manager.get_connection_count()
+    result = {
+        "connections": opened,
+        "elapsed": elapsed,
+        "before": before,
+        "after": after,
+        "per_connection": (after - before) / max(opened, 1),
+        "accounted": manager.get_memory_stats()["per_connection_bytes"],
+    }
+
+    idle.set_result(None)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return result
+
+
+def traced_per_connection(connections: int, batch: int) -> float:
+    """
+    Bytes alocados por conexão pelos módulos do servidor.
+
+    Executado num processo separado para não inflar o RSS medido.
+    """
+    return asyncio.run(open_idle(connections, batch, traced=True))["per_connection"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=100_000, help="Conexões ociosas abertas")
+    parser.add_argument("--batch", type=int, default=5_000, help="Conexões abertas por lote")
+    parser.add_argument(
+        "--max-bytes-per-conn",
+        type=int,
+        default=14_000,
+        help="Limite de RSS por conexão; acima dele o benchmark falha",
+    )
+    parser.add_argument(
+        "--max-traced-bytes-per-conn",
+        type=int,
+        default=450,
+        help="Limite da memória por conexão alocada por ConnectionManager, Outbox e scheduler",
+    )
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        traced = executor.submit(traced_per_connection, args.connections, args.batch).result()
+    measured = asyncio.run(open_idle(args.connections, args.batch))
+    per_connection = measured["per_connection"]
+
+    print(f"Conexões ociosas:          {measured['connections']:,} (abertas em {measured['elapsed']:.1f}s)")
+    print(f"RSS antes / depois:        {measured['before'] / 2**20:,.1f} MiB / {measured['after'] / 2**20:,.1f} MiB")
+    print(f"RSS por conexão:           {per_connection:,.0f} bytes")
+    print(f"Alocado pelo servidor:     {traced:,.0f} bytes/conexão (tracemalloc)")
+    print(f"Contabilizado pelo manager: {measured['accounted']:,.0f} bytes/conexão")
+
+    failures = []
+    if per_connection > args.max_bytes_per_conn:
+        failures.append(f"RSS de {per_connection:,.0f} bytes/conexão excede o limite de {args.max_bytes_per_conn:,}")
+    if traced > args.max_traced_bytes_per_conn:
+        failures.append(
+            f"servidor aloca {traced:,.0f} bytes/conexão, "
+            f"acima do limite de {args.max_traced_bytes_per_conn:,}"
+        )
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    if failures:
+        sys.exit(1)
+    print(
+        f"OK: dentro dos limites de {args.max_bytes_per_conn:,} bytes/conexão (RSS) e "
+        f"{args.max_traced_bytes_per_conn:,} bytes/conexão (servidor)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark de throughput de broadcast: asyncio x uvloop
+
+Sobe o launcher de produção (backend/server.py) uma vez para cada event loop,
+conecta N assinantes e um publicador, publica M mensagens e mede quantas
+entregas por segundo o servidor consegue fazer.
+
+Uso:
+    python benchmarks/bench_loop.py --clients 200 --messages 500
+
+O lado cliente usa sempre o mesmo loop, de modo que a diferença medida vem
+apenas do servidor.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import websockets
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(loop: str, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        LOOP=loop,
+        PORT=str(port),
+        HOST="127.0.0.1",
+        LOG_LEVEL="warning",
+        WORKERS="1",
+    )
+    return subprocess.Popen(
+        [sys.executable, "server.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(uri: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with websockets.connect(uri):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def receive_all(ws, expected: int):
+    for _ in range(expected):
+        await ws.recv()
+
+
+async def run_round(uri: str, clients: int, messages: int, size: int) -> float:
+    """
+    Executa uma rodada e retorna o throughput em entregas por segundo.
+    """
+    subscribers = [await websockets.connect(uri, max_queue=None) for _ in range(clients)]
+    publisher = await websockets.connect(uri)
+    payload = json.dumps({"message": "x" * size})
+
+    try:
+        receivers = [asyncio.create_task(receive_all(ws, messages)) for ws in subscribers]
+        start = time.perf_counter()
+        for _ in range(messages):
+            await publisher.send(payload)
+        await asyncio.gather(*receivers)
+        elapsed = time.perf_counter() - start
+    finally:
+        await publisher.close()
+        await asyncio.gather(*(ws.close() for ws in subscribers))
+
+    return clients * messages / elapsed
+
+
+async def bench_loop(loop: str, args) -> float:
+    port = free_port()
+    process = start_server(loop, port)
+    uri = f"ws://127.0.0.1:{port}/ws/events"
+    try:
+        await wait_until_ready(uri)
+        # Rodada de aquecimento para descartar custos de import e alocação
+        await run_round(uri, min(args.clients, 10), 10, args.size)
+        results = [
+            await run_round(uri, args.clients, args.messages, args.size)
+            for _ in range(args.rounds)
+        ]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+    return max(results)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="Assinantes conectados")
+    parser.add_argument("--messages", type=int, default=200, help="Mensagens publicadas por rodada")
+    parser.add_argument("--size", type=int, default=128, help="Tamanho do conteúdo da mensagem")
+    parser.add_argument("--rounds", type=int, default=3, help="Rodadas por loop (usa a melhor)")
+    parser.add_argument("--loops", default="asyncio,uvloop", help="Loops comparados, separados por vírgula")
+    args = parser.parse_args()
+
+    print(f"Broadcast: {args.clients} assinantes x {args.messages} mensagens de {args.size} bytes")
+    baseline = None
+    for loop in args.loops.split(","):
+        throughput = await bench_loop(loop, args)
+        baseline = baseline or throughput
+        print(f"{loop:>8}: {throughput:12,.0f} entregas/s  ({throughput / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,447 @@
+"""
+Harness - Clientes WebSocket simulados em memória para benchmarks
+
+Permite exercitar o ConnectionManager e a aplicação ASGI (/ws/events) com
+carga reproduzível, sem sockets reais: nada de limites de file descriptors,
+portas ou ruído do kernel na medição, e o processo inteiro pode ser
+perfilado.
+
+Componentes:
+- LinkProfile: latência, banda e falhas simuladas de um cliente
+- SimulatedSocket: substituto do WebSocket do Starlette para usar o
+  ConnectionManager diretamente
+- SimulatedClient / ClientPool: clientes que falam ASGI com a aplicação,
+  passando pelo endpoint real (handshake, validação, scheduler, Outbox)
+- idle_connection: a conexão ociosa mais barata possível, para medir memória
+- profiling: cProfile ou pyinstrument (profiler por amostragem, opcional)
+  em volta de um trecho do benchmark
+
+Uso típico:
+    async with ClientPool(app, 1000, link=LinkProfile(latency=0.005)) as pool:
+        with profiling("cprofile"):
+            pool.clients[0].publish({"message": "oi"})
+            await pool.wait_delivered(999)
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+import argparse
+import asyncio
+import cProfile
+import importlib.util
+import json
+import pstats
+import random
+
+
+@dataclass
+class LinkProfile:
+    """
+    Condições de rede simuladas no sentido servidor -> cliente.
+
+    Attributes:
+        latency: Atraso fixo por mensagem entregue, em segundos
+        bandwidth: Banda em bytes/s (None = ilimitada); soma len/bandwidth ao atraso
+        fail_after: A entrega falha depois de N mensagens (None = nunca)
+        fail_rate: Probabilidade de cada entrega falhar (conexão resetada)
+        seed: Semente do sorteio de falhas, para execuções reproduzíveis
+    """
+    latency: float = 0.0
+    bandwidth: Optional[float] = None
+    fail_after: Optional[int] = None
+    fail_rate: float = 0.0
+    seed: Optional[int] = None
+
+    def delay(self, size: int) -> float:
+        """
+        Atraso de entrega de uma mensagem de size bytes.
+        """
+        delay = self.latency
+        if self.bandwidth:
+            delay += size / self.bandwidth
+        return delay
+
+
+# Perfil fixo ou função índice do cliente -> perfil
+LinkSpec = Union[LinkProfile, Callable[[int], LinkProfile]]
+
+
+class _Link:
+    """
+    Aplica um LinkProfile às entregas de uma conexão.
+    """
+
+    __slots__ = ("profile", "delivered", "bytes", "_random")
+
+    def __init__(self, profile: LinkProfile):
+        self.profile = profile
+        self.delivered = 0
+        self.bytes = 0
+        self._random = random.Random(profile.seed) if profile.fail_rate else None
+
+    def fails(self) -> bool:
+        profile = self.profile
+        if profile.fail_after is not None and self.delivered >= profile.fail_after:
+            return True
+        return self._random is not None and self._random.random() < profile.fail_rate
+
+    async def deliver(self, size: int):
+        """
+        Espera o atraso da entrega e a contabiliza.
+
+        Raises:
+            ConnectionResetError: Quando o perfil injeta uma falha
+        """
+        if self.fails():
+            raise ConnectionResetError("Falha injetada pelo harness")
+        delay = self.profile.delay(size)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.delivered += 1
+        self.bytes += size
+
+
+class SimulatedSocket:
+    """
+    Substituto do WebSocket para usar o ConnectionManager sem a aplicação ASGI.
+
+    Implementa apenas o que o manager usa: accept, send_text e close.
+
+    Attributes:
+        link: Entregas e bytes contabilizados
+        messages: Mensagens recebidas (só quando keep_messages)
+        close_code: Código do fechamento feito pelo servidor, se houver
+    """
+
+    def __init__(self, link: LinkProfile = None, keep_messages: bool = False):
+        self.link = _Link(link or LinkProfile())
+        self.messages: Optional[List[str]] = [] if keep_messages else None
+        self.close_code: Optional[int] = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        await self.link.deliver(len(data))
+        if self.messages is not None:
+            self.messages.append(data)
+
+    async def close(self, code: int = 1000, reason: str = None):
+        self.close_code = code
+
+
+def websocket_scope(path: str = "/ws/events", index: int = 0) -> Dict[str, Any]:
+    """
+    Scope ASGI de um handshake WebSocket vindo de um cliente simulado.
+    """
+    return {
+        "type": "websocket",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "scheme": "ws",
+        "http_version": "1.1",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"harness")],
+        "client": ("10.0.0.1", index % 65536),
+        "server": ("harness", 8000),
+        "subprotocols": [],
+    }
+
+
+async def idle_connection(app, index: int, idle: asyncio.Future, accepted: asyncio.Queue, path: str = "/ws/events"):
+    """
+    Conecta um cliente que nunca envia mensagens.
+
+    O transporte é o mínimo exigido pelo ASGI: entrega o websocket.connect
+    e depois aguarda um futuro compartilhado, sem estado por conexão além do
+    próprio closure, para que a medição de memória reflita o servidor.
+    """
+    connected = False
+
+    async def receive():
+        nonlocal connected
+        if not connected:
+            connected = True
+            return {"type": "websocket.connect"}
+        await idle
+        return {"type": "websocket.disconnect", "code": 1000}
+
+    async def send(message):
+        if message["type"] == "websocket.accept":
+            accepted.put_nowait(index)
+
+    await app(websocket_scope(path, index), receive, send)
+
+
+class SimulatedClient:
+    """
+    Cliente WebSocket em memória conectado à aplicação ASGI.
+
+    Attributes:
+        index: Posição do cliente no pool
+        link: Entregas e bytes recebidos do servidor
+        messages: Mensagens recebidas (só quando keep_messages)
+        close_code: Código de fechamento enviado pelo servidor, se houver
+        failed: True se uma falha injetada derrubou a conexão
+    """
+
+    def __init__(
+        self,
+        app,
+        index: int = 0,
+        path: str = "/ws/events",
+        link: LinkProfile = None,
+        keep_messages: bool = False,
+        on_delivery: Callable[[str], None] = None,
+    ):
+        self.app = app
+        self.index = index
+        self.path = path
+        self.link = _Link(link or LinkProfile())
+        self.messages: Optional[List[str]] = [] if keep_messages else None
+        self.close_code: Optional[int] = None
+        self.failed = False
+        self._on_delivery = on_delivery
+        self._inbound: asyncio.Queue = asyncio.Queue()
+        self._accepted = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _receive(self) -> Dict[str, Any]:
+        return await self._inbound.get()
+
+    async def _send(self, message: Dict[str, Any]):
+        kind = message["type"]
+        if kind == "websocket.send":
+            data = message.get("text") or message.get("bytes") or ""
+            try:
+                await self.link.deliver(len(data))
+            except ConnectionResetError:
+                # O lado de leitura do servidor também percebe a queda
+                self.failed = True
+                self._inbound.put_nowait({"type": "websocket.disconnect", "code": 1006})
+                raise
+            if self.messages is not None:
+                self.messages.append(data)
+            if self._on_delivery is not None:
+                self._on_delivery(data)
+        elif kind == "websocket.accept":
+            self._accepted.set()
+        elif kind == "websocket.close":
+            self.close_code = message.get("code", 1000)
+            self._accepted.set()
+
+    async def connect(self):
+        """
+        Executa o handshake e aguarda o servidor aceitar (ou recusar).
+        """
+        self._inbound.put_nowait({"type": "websocket.connect"})
+        self._task = asyncio.get_running_loop().create_task(
+            self.app(websocket_scope(self.path, self.index), self._receive, self._send)
+        )
+        await self._accepted.wait()
+
+    def send_text(self, text: str):
+        """
+        Envia um frame de texto ao servidor.
+        """
+        self._inbound.put_nowait({"type": "websocket.receive", "text": text})
+
+    def publish(self, payload: Dict[str, Any]):
+        """
+        Envia uma mensagem JSON ao servidor.
+        """
+        self.send_text(json.dumps(payload))
+
+    async def disconnect(self, code: int = 1000):
+        """
+        Encerra a conexão pelo lado do cliente e aguarda o endpoint terminar.
+        """
+        if self._task is None:
+            return
+        self._inbound.put_nowait({"type": "websocket.disconnect", "code": code})
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+class ClientPool:
+    """
+    Conjunto de clientes simulados conectados à aplicação.
+
+    Pode ser usado como async context manager: conecta na entrada e
+    desconecta todos os clientes na saída.
+
+    Attributes:
+        clients: Clientes do pool, na ordem dos índices
+        delivered: Mensagens entregues a qualquer cliente do pool
+    """
+
+    def __init__(
+        self,
+        app,
+        size: int,
+        path: str = "/ws/events",
+        link: LinkSpec = None,
+        keep_messages: bool = False,
+        batch: int = 1000,
+    ):
+        """
+        Args:
+            app: Aplicação ASGI
+            size: Quantidade de clientes
+            path: Endpoint WebSocket
+            link: Perfil de rede comum ou função índice -> perfil
+            keep_messages: Guardar o texto das mensagens recebidas
+            batch: Clientes conectados em paralelo por vez
+        """
+        self.app = app
+        self.size = size
+        self.path = path
+        self.batch = batch
+        self.delivered = 0
+        self._link = link
+        self._keep_messages = keep_messages
+        self._target: Optional[int] = None
+        self._reached = asyncio.Event()
+        self.clients: List[SimulatedClient] = []
+
+    def _profile(self, index: int) -> LinkProfile:
+        if callable(self._link):
+            return self._link(index)
+        return self._link or LinkProfile()
+
+    def _count(self, data: str):
+        self.delivered += 1
+        if self._target is not None and self.delivered >= self._target:
+            self._reached.set()
+
+    async def open(self):
+        """
+        Conecta todos os clientes, em lotes.
+        """
+        for first in range(0, self.size, self.batch):
+            batch = [
+                SimulatedClient(
+                    self.app,
+                    index,
+                    self.path,
+                    self._profile(index),
+                    self._keep_messages,
+                    on_delivery=self._count,
+                )
+                for index in range(first, min(first + self.batch, self.size))
+            ]
+            await asyncio.gather(*(client.connect() for client in batch))
+            self.clients.extend(batch)
+
+    async def close(self):
+        """
+        Desconecta todos os clientes.
+        """
+        await asyncio.gather(*(client.disconnect() for client in self.clients))
+
+    async def wait_delivered(self, total: int, timeout: float = 30.0) -> bool:
+        """
+        Aguarda o pool somar total entregas desde a criação.
+
+        Returns:
+            bool: False se o tempo esgotou antes
+        """
+        if self.delivered >= total:
+            return True
+        self._target = total
+        self._reached.clear()
+        try:
+            await asyncio.wait_for(self._reached.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._target = None
+        return True
+
+    def failed(self) -> int:
+        """
+        Clientes derrubados por falha injetada.
+        """
+        return sum(client.failed for client in self.clients)
+
+    async def __aenter__(self) -> "ClientPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+
+def add_profiling_arguments(parser: argparse.ArgumentParser):
+    """
+    Acrescenta --profile e --profile-output a um benchmark.
+    """
+    parser.add_argument("--profile", choices=PROFILERS, default=None, help="Perfilar o trecho medido")
+    parser.add_argument(
+        "--profile-output",
+        default=None,
+        help="Arquivo de saída (.prof para cProfile, .html para pyinstrument); padrão: resumo no terminal",
+    )
+
+
+@contextmanager
+def profiling(profiler: Optional[str], output: Optional[str] = None, limit: int = 30) -> Iterator[None]:
+    """
+    Perfila o bloco com cProfile ou pyinstrument.
+
+    cProfile mede todas as chamadas (determinístico, com overhead por chamada);
+    pyinstrument amostra a pilha periodicamente e acompanha corrotinas, com
+    overhead menor. pyinstrument é opcional e só é exigido quando pedido.
+
+    Args:
+        profiler: "cprofile", "pyinstrument" ou None (sem perfil)
+        output: Arquivo de saída; sem ele o resumo é impresso no terminal
+        limit: Linhas do resumo do cProfile
+
+    Raises:
+        RuntimeError: Se pyinstrument foi pedido e não está instalado
+    """
+    if profiler is None:
+        yield
+        return
+
+    if profiler == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            if output:
+                profile.dump_stats(output)
+                print(f"Perfil salvo em {output} (abrir com: python -m pstats {output})")
+            else:
+                pstats.Stats(profile).sort_stats("cumulative").print_stats(limit)
+        return
+
+    if profiler == "pyinstrument":
+        if importlib.util.find_spec("pyinstrument") is None:
+            raise RuntimeError("--profile pyinstrument requer o pacote pyinstrument instalado")
+        from pyinstrument import Profiler
+
+        sampler = Profiler(async_mode="enabled")
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            if output:
+                with open(output, "w") as report:
+                    report.write(sampler.output_html())
+                print(f"Perfil salvo em {output}")
+            else:
+                print(sampler.output_text(unicode=True, color=False))
+        return
+
+    raise RuntimeError(f"Profiler desconhecido: {profiler}")
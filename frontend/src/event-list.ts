@@ -0,0 +1,136 @@
+/**
+ * Lista de eventos virtualizada e limitada
+ *
+ * Mantém no máximo `capacity` itens (buffer circular) e só cria no DOM as
+ * linhas visíveis, mais uma margem acima e abaixo. O custo de inserir um
+ * lote e de renderizar não depende de quantos eventos já chegaram.
+ *
+ * As linhas têm altura fixa (o texto longo é truncado), o que permite
+ * calcular a janela visível direto a partir do scrollTop.
+ *
+ * O item mais recente fica no fim da lista, que acompanha as chegadas
+ * enquanto o usuário está no fim; quem rolou para cima continua vendo
+ * os mesmos itens.
+ */
+
+import { RingBuffer } from './ring-buffer';
+
+export interface VirtualEventListOptions<T> {
+  capacity: number;
+  rowHeight: number;
+  renderRow: (item: T) => string; // HTML da linha, já escapado
+  overscan?: number; // Linhas extras renderizadas fora da área visível
+}
+
+export class VirtualEventList<T> {
+  private container: HTMLElement;
+  private items: RingBuffer<T>;
+  private rowHeight: number;
+  private overscan: number;
+  private renderRow: (item: T) => string;
+  private spacer: HTMLElement;
+  private rows: HTMLElement;
+  private emptyStateHtml: string;
+  private scrollFrame: number | null = null;
+
+  constructor(container: HTMLElement, options: VirtualEventListOptions<T>) {
+    this.container = container;
+    this.items = new RingBuffer<T>(options.capacity);
+    this.rowHeight = options.rowHeight;
+    this.overscan = options.overscan ?? 5;
+    this.renderRow = options.renderRow;
+
+    // O conteúdo inicial do container é o estado vazio
+    this.emptyStateHtml = container.innerHTML;
+
+    this.spacer = document.createElement('div');
+    this.spacer.className = 'virtual-spacer';
+    this.rows = document.createElement('div');
+    this.rows.className = 'virtual-rows';
+    this.spacer.appendChild(this.rows);
+
+    container.classList.add('virtual-list');
+    container.style.setProperty('--virtual-row-height', `${this.rowHeight}px`);
+    container.addEventListener('scroll', () => this.scheduleRender(), { passive: true });
+  }
+
+  get size(): number {
+    return this.items.size;
+  }
+
+  /**
+   * Adiciona um lote de itens (do mais antigo para o mais recente) e renderiza uma vez.
+   * Os mais recentes aparecem no fim da lista.
+   */
+  push(batch: T[]): void {
+    if (batch.length === 0) {
+      return;
+    }
+
+    const previous = this.items.size;
+    const wasEmpty = previous === 0;
+    const atBottom = wasEmpty || this.isAtBottom();
+    for (const item of batch) {
+      this.items.push(item);
+    }
+    // Itens mais antigos descartados pelo buffer circular
+    const evicted = previous + batch.length - this.items.size;
+
+    if (wasEmpty) {
+      this.container.innerHTML = '';
+      this.container.appendChild(this.spacer);
+    }
+    // A altura é atualizada antes para o scrollTop não ser limitado pela anterior
+    this.spacer.style.height = `${this.items.size * this.rowHeight}px`;
+
+    if (atBottom) {
+      this.container.scrollTop = this.container.scrollHeight;
+    } else if (evicted > 0) {
+      // Quem rolou para cima continua vendo os mesmos eventos: o descarte
+      // dos mais antigos deslocaria a lista para cima
+      this.container.scrollTop -= evicted * this.rowHeight;
+    }
+
+    this.render();
+  }
+
+  clear(): void {
+    this.items.clear();
+    this.rows.innerHTML = '';
+    this.container.innerHTML = this.emptyStateHtml;
+    this.container.scrollTop = 0;
+  }
+
+  private isAtBottom(): boolean {
+    const { scrollTop, scrollHeight, clientHeight } = this.container;
+    return scrollHeight - scrollTop - clientHeight <= this.rowHeight / 2;
+  }
+
+  private scheduleRender(): void {
+    if (this.scrollFrame === null) {
+      this.scrollFrame = requestAnimationFrame(() => {
+        this.scrollFrame = null;
+        this.render();
+      });
+    }
+  }
+
+  private render(): void {
+    const count = this.items.size;
+    if (count === 0) {
+      return;
+    }
+
+    const first = Math.max(0, Math.floor(this.container.scrollTop / this.rowHeight) - this.overscan);
+    const visible = Math.ceil(this.container.clientHeight / this.rowHeight) + 2 * this.overscan;
+    const last = Math.min(count, first + visible);
+
+    let html = '';
+    for (let i = first; i < last; i++) {
+      html += this.renderRow(this.items.get(i) as T);
+    }
+
+    this.rows.style.transform = `translateY(${first * this.rowHeight}px)`;
+    this.rows.innerHTML = html;
+  }
+}
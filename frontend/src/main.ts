@@ -1,16 +1,24 @@
 /**
  * WebSocket Event Panel - Aplicação Principal
  * Dashboard profissional com métricas técnicas em tempo real
+ *
+ * Mensagens recebidas são acumuladas e aplicadas ao DOM uma vez por frame
+ * (requestAnimationFrame) em listas virtualizadas: rajadas de milhares de
+ * eventos por segundo custam um render por frame, não um por mensagem.
  */
 
 import './style.css';
 import type { 
   WebSocketMessage, 
   EventItem, 
+  ChatItem,
   ConnectionStatus,
-  Metrics 
+  Metrics,
+  PublishAck,
+  ReconnectHint
 } from './types';
 import { MetricsCollector } from './metrics';
+import { VirtualEventList } from './event-list';
 
 // Detecta se está rodando via Docker (nginx proxy) ou localmente
 const WS_PROTOCOL = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -20,16 +28,31 @@ const WS_HOST = window.location.hostname === 'localhost' && window.location.port
 const WS_URL = `${WS_PROTOCOL}//${WS_HOST}/ws/events`;
 const RECONNECT_DELAY = 3000;
 const METRICS_UPDATE_INTERVAL = 1000;
+const EVENT_LIST_CAPACITY = 5000; // Eventos mantidos em cada lista
+const EVENT_ROW_HEIGHT = 80; // px, altura fixa das linhas virtualizadas
+
+const TIME_FORMAT = new Intl.DateTimeFormat('pt-BR', {
+  hour: '2-digit',
+  minute: '2-digit',
+  second: '2-digit'
+});
 
 class EventPanelApp {
   private websocket: WebSocket | null = null;
   private metricsCollector: MetricsCollector;
   private reconnectTimeout: number | null = null;
+  private reconnectHintDelay: number | null = null; // Atraso sugerido pelo servidor no restart
   private metricsInterval: number | null = null;
   private eventIdCounter = 0;
-  private sentTimestamps: Map<string, number> = new Map();
+  private sentTimestamps: Map<string, number> = new Map(); // correlation_id -> envio
+  private correlationCounter = 0;
   private sentEventsCount = 0; // Contador de eventos enviados
 
+  // Itens aguardando o próximo frame
+  private pendingEvents: EventItem[] = [];
+  private pendingChat: ChatItem[] = [];
+  private renderFrame: number | null = null;
+
   // Elementos DOM
   private elements = {
     connectionBadge: document.getElementById('connection-badge')!,
@@ -50,6 +73,18 @@ class EventPanelApp {
     metricUptime: document.getElementById('metric-uptime')!,
   };
 
+  private eventList = new VirtualEventList<EventItem>(this.elements.eventsContainer, {
+    capacity: EVENT_LIST_CAPACITY,
+    rowHeight: EVENT_ROW_HEIGHT,
+    renderRow: (event) => this.renderEventRow(event)
+  });
+
+  private chatList = new VirtualEventList<ChatItem>(this.elements.chatContainer, {
+    capacity: EVENT_LIST_CAPACITY,
+    rowHeight: EVENT_ROW_HEIGHT,
+    renderRow: (item) => this.renderChatRow(item)
+  });
+
   constructor() {
     this.metricsCollector = new MetricsCollector();
     this.init();
@@ -114,32 +149,40 @@ class EventPanelApp {
     try {
       const data: WebSocketMessage = JSON.parse(event.data);
       
+      // Servidor em restart: reconectar após o atraso sugerido (escalonado)
+      if ((data as unknown as ReconnectHint).type === 'reconnect') {
+        this.reconnectHintDelay = (data as unknown as ReconnectHint).retry_after_ms;
+        return;
+      }
+
       if ('error' in data) {
         console.error('❌ Erro do servidor:', data.error);
         return;
       }
 
       const receivedAt = Date.now();
-      let latency: number | undefined;
 
-      // Calcular latência apenas para mensagens que enviamos (round-trip time)
-      const sentTime = this.sentTimestamps.get(data.message);
-      if (sentTime) {
-        latency = receivedAt - sentTime;
-        this.sentTimestamps.delete(data.message);
+      // Ack de publicação: latência de ida e volta pelo correlation_id
+      if ((data as unknown as PublishAck).type === 'ack') {
+        const ack = data as unknown as PublishAck;
+        const sentTime = this.sentTimestamps.get(ack.correlation_id);
+        if (sentTime !== undefined) {
+          this.metricsCollector.addLatency(receivedAt, receivedAt - sentTime);
+          this.sentTimestamps.delete(ack.correlation_id);
+        }
+        return;
       }
 
       const eventItem: EventItem = {
         ...data,
         id: ++this.eventIdCounter,
-        receivedAt,
-        latency
+        receivedAt
       };
 
       this.metricsCollector.addEvent(eventItem);
-      this.addEventToUI(eventItem); // Broadcast: só recebidos
-      this.addEventToChatUI(eventItem, 'received'); // Chat: lado esquerdo
-      this.updateMetricsUI();
+      this.pendingEvents.push(eventItem); // Broadcast: só recebidos
+      this.pendingChat.push({ message: eventItem.message, timestamp: eventItem.timestamp, type: 'received' }); // Chat: lado esquerdo
+      this.scheduleRender();
 
     } catch (error) {
       console.error('❌ Erro ao processar mensagem:', error);
@@ -160,11 +203,13 @@ class EventPanelApp {
 
   private scheduleReconnect(): void {
     if (!this.reconnectTimeout) {
-      console.log('🔄 Reconectando em 3 segundos...');
+      const delay = this.reconnectHintDelay ?? RECONNECT_DELAY;
+      this.reconnectHintDelay = null;
+      console.log(`🔄 Reconectando em ${(delay / 1000).toFixed(1)} segundos...`);
       this.reconnectTimeout = window.setTimeout(() => {
         this.reconnectTimeout = null;
         this.connectWebSocket();
-      }, RECONNECT_DELAY);
+      }, delay);
     }
   }
 
@@ -201,25 +246,27 @@ class EventPanelApp {
 
     try {
       const sentAt = Date.now();
-      this.sentTimestamps.set(message, sentAt);
+      const correlationId = this.nextCorrelationId();
+      this.sentTimestamps.set(correlationId, sentAt);
 
-      const payload = JSON.stringify({ message });
+      // O mesmo ID serve de chave de idempotência: um reenvio não duplica o broadcast
+      const payload = JSON.stringify({ message, correlation_id: correlationId, idempotency_key: correlationId });
       this.websocket.send(payload);
 
       console.log('📤 Evento enviado:', message);
 
       // Adicionar evento enviado localmente apenas no chat (lado direito)
       this.sentEventsCount++;
-      this.addEventToChatUI({ message, timestamp: new Date(sentAt).toISOString() } as any, 'sent');
-      this.updateMetricsUI();
+      this.pendingChat.push({ message, timestamp: new Date(sentAt).toISOString(), type: 'sent' });
+      this.scheduleRender();
 
       // Limpar campo
       this.elements.eventInput.value = '';
       this.elements.eventInput.focus();
 
-      // Limpar timestamps antigos (mais de 10 segundos)
+      // Limpar timestamps sem ack (mais de 10 segundos)
       setTimeout(() => {
-        this.sentTimestamps.delete(message);
+        this.sentTimestamps.delete(correlationId);
       }, 10000);
 
     } catch (error) {
@@ -228,62 +275,69 @@ class EventPanelApp {
     }
   }
 
-  private addEventToUI(event: EventItem): void {
-    // Remover estado vazio
-    const emptyState = this.elements.eventsContainer.querySelector('.empty-state');
-    if (emptyState) {
-      emptyState.remove();
+  private nextCorrelationId(): string {
+    // randomUUID só existe em contextos seguros (https/localhost)
+    if (typeof crypto !== 'undefined' && 'randomUUID' in crypto) {
+      return crypto.randomUUID();
     }
+    return `${Date.now().toString(36)}-${(++this.correlationCounter).toString(36)}`;
+  }
 
-    const eventElement = document.createElement('div');
-    eventElement.className = 'event-item'; // Broadcast: sem distinção de lado
-
-    const timestamp = new Date(event.timestamp).toLocaleString('pt-BR', {
-      hour: '2-digit',
-      minute: '2-digit',
-      second: '2-digit'
-    });
-
-    eventElement.innerHTML = `
-      <div class="event-bubble">
-        <div class="event-description">${this.escapeHtml(event.message)}</div>
-        <div class="event-time">${timestamp}</div>
-      </div>
-    `;
+  /**
+   * Agenda a aplicação dos itens pendentes no próximo frame
+   */
+  private scheduleRender(): void {
+    // Aba em segundo plano não recebe frames: descartar o que já não caberia nas listas
+    if (this.pendingEvents.length > 2 * EVENT_LIST_CAPACITY) {
+      this.pendingEvents = this.pendingEvents.slice(-EVENT_LIST_CAPACITY);
+    }
+    if (this.pendingChat.length > 2 * EVENT_LIST_CAPACITY) {
+      this.pendingChat = this.pendingChat.slice(-EVENT_LIST_CAPACITY);
+    }
 
-    this.elements.eventsContainer.insertBefore(
-      eventElement, 
-      this.elements.eventsContainer.firstChild
-    );
+    if (this.renderFrame === null) {
+      this.renderFrame = requestAnimationFrame(() => this.flushPending());
+    }
   }
 
-  private addEventToChatUI(event: EventItem | { message: string, timestamp: string }, type: 'sent' | 'received'): void {
-    // Remover estado vazio
-    const emptyState = this.elements.chatContainer.querySelector('.empty-state');
-    if (emptyState) {
-      emptyState.remove();
-    }
+  private flushPending(): void {
+    this.renderFrame = null;
 
-    const eventElement = document.createElement('div');
-    eventElement.className = `event-item event-${type}`;
+    const events = this.pendingEvents;
+    const chat = this.pendingChat;
+    this.pendingEvents = [];
+    this.pendingChat = [];
 
-    const timestamp = new Date(event.timestamp).toLocaleString('pt-BR', {
-      hour: '2-digit',
-      minute: '2-digit',
-      second: '2-digit'
-    });
+    this.eventList.push(events);
+    this.chatList.push(chat);
+    this.updateMetricsUI();
+  }
 
-    eventElement.innerHTML = `
-      <div class="event-bubble">
-        <div class="event-description">${this.escapeHtml(event.message)}</div>
-        <div class="event-time">${timestamp}</div>
+  private renderEventRow(event: EventItem): string {
+    // Broadcast: sem distinção de lado
+    return `
+      <div class="event-item">
+        <div class="event-bubble">
+          <div class="event-description">${this.escapeHtml(event.message)}</div>
+          <div class="event-time">${this.formatTime(event.timestamp)}</div>
+        </div>
       </div>
     `;
+  }
 
-    this.elements.chatContainer.insertBefore(
-      eventElement, 
-      this.elements.chatContainer.firstChild
-    );
+  private renderChatRow(item: ChatItem): string {
+    return `
+      <div class="event-item event-${item.type}">
+        <div class="event-bubble">
+          <div class="event-description">${this.escapeHtml(item.message)}</div>
+          <div class="event-time">${this.formatTime(item.timestamp)}</div>
+        </div>
+      </div>
+    `;
+  }
+
+  private formatTime(timestamp: string): string {
+    return TIME_FORMAT.format(new Date(timestamp));
   }
 
   private disconnect(): void {
@@ -304,19 +358,8 @@ class EventPanelApp {
   }
 
   private clearEvents(): void {
-    this.elements.eventsContainer.innerHTML = `
-      <div class="empty-state">
-        <svg class="empty-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-          <path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"></path>
-          <polyline points="14 2 14 8 20 8"></polyline>
-          <line x1="16" y1="13" x2="8" y2="13"></line>
-          <line x1="16" y1="17" x2="8" y2="17"></line>
-          <polyline points="10 9 9 9 8 9"></polyline>
-        </svg>
-        <h3>Nenhum evento recebido ainda</h3>
-        <p>Os eventos aparecerão aqui em tempo real assim que forem disparados</p>
-      </div>
-    `;
+    this.pendingEvents = [];
+    this.eventList.clear();
 
     this.metricsCollector.clearEvents();
     this.eventIdCounter = 0;
@@ -325,15 +368,8 @@ class EventPanelApp {
   }
 
   private clearChat(): void {
-    this.elements.chatContainer.innerHTML = `
-      <div class="empty-state">
-        <svg class="empty-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-          <path d="M21 15a2 2 0 0 1-2 2H7l-4 4V5a2 2 0 0 1 2-2h14a2 2 0 0 1 2 2z"></path>
-        </svg>
-        <h3>Nenhuma mensagem ainda</h3>
-        <p>Suas mensagens aparecerão à direita, mensagens recebidas à esquerda</p>
-      </div>
-    `;
+    this.pendingChat = [];
+    this.chatList.clear();
   }
 
   private startMetricsUpdate(): void {
@@ -383,6 +419,10 @@ class EventPanelApp {
     if (this.metricsInterval) {
       clearInterval(this.metricsInterval);
     }
+
+    if (this.renderFrame !== null) {
+      cancelAnimationFrame(this.renderFrame);
+    }
   }
 }
 
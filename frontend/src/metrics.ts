@@ -1,59 +1,75 @@
 /**
  * Sistema de métricas e estatísticas
+ *
+ * Históricos em buffers circulares e contagem por segundo: registrar um
+ * evento é O(1), mesmo com milhares de eventos por segundo.
  */
 
 import type { Metrics, LatencyDataPoint, EventItem } from './types';
+import { RingBuffer } from './ring-buffer';
+
+const SECONDS_PER_MINUTE = 60;
 
 export class MetricsCollector {
-  private events: EventItem[] = [];
-  private latencyHistory: LatencyDataPoint[] = [];
-  private connectionStartTime: number = 0;
   private maxHistorySize = 100;
   private maxLatencyPoints = 50;
+  private events = new RingBuffer<EventItem>(this.maxHistorySize);
+  private latencyHistory = new RingBuffer<LatencyDataPoint>(this.maxLatencyPoints);
+  private receivedCount = 0;
+  // Eventos por segundo do último minuto, indexados por (segundo % 60)
+  private secondCounts: number[] = new Array(SECONDS_PER_MINUTE).fill(0);
+  private secondStamps: number[] = new Array(SECONDS_PER_MINUTE).fill(-1);
+  private connectionStartTime: number = 0;
 
   constructor() {
     this.reset();
   }
 
   reset(): void {
-    this.events = [];
-    this.latencyHistory = [];
+    this.clearEvents();
+    this.latencyHistory.clear();
     this.connectionStartTime = Date.now();
   }
 
   addEvent(event: EventItem): void {
     this.events.push(event);
-    
-    // Manter apenas os últimos N eventos
-    if (this.events.length > this.maxHistorySize) {
-      this.events.shift();
+    this.receivedCount++;
+
+    const second = Math.floor(event.receivedAt / 1000);
+    const slot = second % SECONDS_PER_MINUTE;
+    if (this.secondStamps[slot] !== second) {
+      this.secondStamps[slot] = second;
+      this.secondCounts[slot] = 0;
     }
+    this.secondCounts[slot]++;
 
     // Adicionar latência ao histórico se disponível
     if (event.latency !== undefined) {
-      this.latencyHistory.push({
-        timestamp: event.receivedAt,
-        latency: event.latency
-      });
-
-      // Manter apenas os últimos N pontos
-      if (this.latencyHistory.length > this.maxLatencyPoints) {
-        this.latencyHistory.shift();
-      }
+      this.addLatency(event.receivedAt, event.latency);
     }
   }
 
+  /**
+   * Registra a latência de ida e volta confirmada por um ack do servidor
+   */
+  addLatency(timestamp: number, latency: number): void {
+    this.latencyHistory.push({ timestamp, latency });
+  }
+
   getMetrics(): Metrics {
     const now = Date.now();
-    const oneMinuteAgo = now - 60000;
+    const currentSecond = Math.floor(now / 1000);
     
     // Eventos do último minuto
-    const recentEvents = this.events.filter(e => e.receivedAt > oneMinuteAgo);
+    let eventsPerMinute = 0;
+    for (let slot = 0; slot < SECONDS_PER_MINUTE; slot++) {
+      if (this.secondStamps[slot] > currentSecond - SECONDS_PER_MINUTE) {
+        eventsPerMinute += this.secondCounts[slot];
+      }
+    }
     
-    // Calcular estatísticas de latência
-    const latencies = this.events
-      .map(e => e.latency)
-      .filter((l): l is number => l !== undefined);
+    // Calcular estatísticas de latência (eventos e acks de publicação)
+    const latencies = this.latencyHistory.toArray().map(point => point.latency);
     
     const avgLatency = latencies.length > 0
       ? latencies.reduce((sum, l) => sum + l, 0) / latencies.length
@@ -63,13 +79,11 @@ export class MetricsCollector {
     const maxLatency = latencies.length > 0 ? Math.max(...latencies) : 0;
     
     // Último evento
-    const lastEvent = this.events.length > 0 
-      ? this.events[this.events.length - 1]
-      : null;
+    const lastEvent = this.events.last() ?? null;
 
     return {
-      totalEvents: this.events.length,
-      eventsPerMinute: recentEvents.length,
+      totalEvents: this.receivedCount,
+      eventsPerMinute,
       averageLatency: Math.round(avgLatency),
       minLatency: Math.round(minLatency),
       maxLatency: Math.round(maxLatency),
@@ -79,11 +93,14 @@ export class MetricsCollector {
   }
 
   getLatencyHistory(): LatencyDataPoint[] {
-    return [...this.latencyHistory];
+    return this.latencyHistory.toArray();
   }
 
   clearEvents(): void {
-    this.events = [];
+    this.events.clear();
+    this.receivedCount = 0;
+    this.secondCounts.fill(0);
+    this.secondStamps.fill(-1);
   }
 
   startConnection(): void {
@@ -0,0 +1,62 @@
+/**
+ * Buffer circular de capacidade fixa
+ *
+ * Inserção O(1) sem realocar nem deslocar elementos (ao contrário de
+ * Array.shift(), que é O(n) a cada item descartado). Cheio, o item mais
+ * antigo é sobrescrito.
+ */
+
+export class RingBuffer<T> {
+  private items: (T | undefined)[];
+  private start = 0;
+  private count = 0;
+  readonly capacity: number;
+
+  constructor(capacity: number) {
+    this.capacity = capacity;
+    this.items = new Array(capacity);
+  }
+
+  get size(): number {
+    return this.count;
+  }
+
+  push(item: T): void {
+    if (this.count < this.capacity) {
+      this.items[(this.start + this.count) % this.capacity] = item;
+      this.count++;
+    } else {
+      // Cheio: sobrescreve o mais antigo
+      this.items[this.start] = item;
+      this.start = (this.start + 1) % this.capacity;
+    }
+  }
+
+  /**
+   * Item na posição index, do mais antigo (0) para o mais recente (size - 1)
+   */
+  get(index: number): T | undefined {
+    if (index < 0 || index >= this.count) {
+      return undefined;
+    }
+    return this.items[(this.start + index) % this.capacity];
+  }
+
+  last(): T | undefined {
+    return this.get(this.count - 1);
+  }
+
+  toArray(): T[] {
+    const result: T[] = new Array(this.count);
+    for (let i = 0; i < this.count; i++) {
+      result[i] = this.items[(this.start + i) % this.capacity] as T;
+    }
+    return result;
+  }
+
+  clear(): void {
+    this.items = new Array(this.capacity);
+    this.start = 0;
+    this.count = 0;
+  }
+}
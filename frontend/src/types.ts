@@ -5,6 +5,29 @@
 export interface WebSocketMessage {
   message: string;
   timestamp: string;
+  correlation_id?: string | null;
+  timings?: Record<string, number> | null;
+}
+
+/**
+ * Confirmação do servidor para publicações com correlation_id
+ */
+export interface PublishAck {
+  type: 'ack';
+  correlation_id: string;
+  recipients: number;
+  timestamp: string;
+  timings: Record<string, number>;
+  duplicate?: boolean;
+}
+
+/**
+ * Dica enviada pelo servidor antes de fechar a conexão durante um restart
+ */
+export interface ReconnectHint {
+  type: 'reconnect';
+  reason: string;
+  retry_after_ms: number;
 }
 
 export interface EventItem extends WebSocketMessage {
@@ -13,6 +36,15 @@ export interface EventItem extends WebSocketMessage {
   latency?: number;
 }
 
+/**
+ * Mensagem exibida no painel de chat (enviada por este cliente ou recebida)
+ */
+export interface ChatItem {
+  message: string;
+  timestamp: string;
+  type: 'sent' | 'received';
+}
+
 export interface Metrics {
   totalEvents: number;
   eventsPerMinute: number;
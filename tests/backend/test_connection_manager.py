@@ -4,6 +4,9 @@ Testa o gerenciamento do pool de conexões WebSocket
 """
 
 import pytest
+import asyncio
+import json
+import logging
 from fastapi import WebSocket
 from unittest.mock import AsyncMock, MagicMock
 import sys
@@ -13,7 +16,8 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent.parent / 'backend'
 sys.path.insert(0, str(backend_path))
 
-from connection_manager import ConnectionManager
+from connection_manager import ConnectionManager, CLOSE_CODE_SERVICE_RESTART
+from outbound import Outbox
 
 
 @pytest.fixture
@@ -76,6 +80,16 @@ class TestConnectionManager:
         assert mock_websocket not in manager.active_connections
         assert len(manager.active_connections) == 0
 
+    def test_disconnect_twice_logs_once(self, manager, mock_websocket, caplog):
+        """Testa que desconectar de novo a mesma conexão não repete o log"""
+        manager.active_connections.add(mock_websocket)
+
+        with caplog.at_level(logging.INFO, logger="connection_manager"):
+            manager.disconnect(mock_websocket)
+            manager.disconnect(mock_websocket)
+
+        assert [r.getMessage() for r in caplog.records].count("Conexão encerrada. Total de conexões: 0") == 1
+
     def test_disconnect_nonexistent(self, manager, mock_websocket):
         """Testa desconexão de cliente não existente (não deve gerar erro)"""
         manager.disconnect(mock_websocket)
@@ -95,6 +109,7 @@ class TestConnectionManager:
         message = "test message"
 
         await manager.broadcast(message)
+        await manager.flush()
 
         ws1.send_text.assert_called_once_with(message)
         ws2.send_text.assert_called_once_with(message)
@@ -115,6 +130,7 @@ class TestConnectionManager:
         message = "test message"
 
         await manager.broadcast(message, sender=sender)
+        await manager.flush()
 
         sender.send_text.assert_not_called()
         ws1.send_text.assert_called_once_with(message)
@@ -133,6 +149,7 @@ class TestConnectionManager:
         message = "test message"
 
         await manager.broadcast(message)
+        await manager.flush()
 
         # Conexão com erro deve ser removida
         assert ws_error not in manager.active_connections
@@ -149,3 +166,213 @@ class TestConnectionManager:
         # Não deve gerar erro
         await manager.broadcast(message)
         assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_disconnect_discards_outbox(self, manager, mock_websocket):
+        """Testa que a fila de saída é descartada na desconexão"""
+        await manager.connect(mock_websocket)
+        assert mock_websocket in manager.outboxes
+
+        manager.disconnect(mock_websocket)
+
+        assert mock_websocket not in manager.outboxes
+
+    @pytest.mark.asyncio
+    async def test_send_uses_control_lane(self, manager, mock_websocket):
+        """Testa que respostas diretas passam à frente dos eventos enfileirados"""
+        await manager.connect(mock_websocket)
+
+        for i in range(3):
+            await manager.broadcast(f"event {i}")
+        manager.send(mock_websocket, "error")
+        await manager.flush()
+
+        sent = [call.args[0] for call in mock_websocket.send_text.call_args_list]
+        assert sent[0] == "error"
+        assert sent[1:] == ["event 0", "event 1", "event 2"]
+
+    @pytest.mark.asyncio
+    async def test_send_to_disconnected_is_ignored(self, manager, mock_websocket):
+        """Testa que envios para conexões fora do pool são descartados"""
+        manager.send(mock_websocket, "late message")
+        await manager.flush()
+
+        mock_websocket.send_text.assert_not_called()
+        assert mock_websocket not in manager.outboxes
+
+
+class TestMemoryAccounting:
+    """Suite de testes para a contabilidade de memória por conexão"""
+
+    @pytest.mark.asyncio
+    async def test_memory_stats_idle(self, manager):
+        """Testa a estimativa de memória com conexões ociosas"""
+        for _ in range(10):
+            ws = MagicMock(spec=WebSocket)
+            ws.accept = AsyncMock()
+            await manager.connect(ws)
+
+        stats = manager.get_memory_stats()
+
+        assert stats["per_connection_bytes"] > 0
+        assert stats["accounted_bytes"] >= 10 * Outbox.idle_memory_size()
+        assert stats["rss_bytes"] > 0
+
+    @pytest.mark.asyncio
+    async def test_memory_stats_backlog(self, manager, mock_websocket):
+        """Testa que mensagens enfileiradas aumentam a memória contabilizada"""
+        await manager.connect(mock_websocket)
+        idle = manager.get_memory_stats()["accounted_bytes"]
+
+        await manager.broadcast("x" * 4096)
+
+        assert manager.get_memory_stats()["accounted_bytes"] > idle + 4096
+        await manager.flush()
+
+    def test_memory_stats_empty(self, manager):
+        """Testa a estimativa sem conexões"""
+        assert manager.get_memory_stats()["per_connection_bytes"] == 0.0
+
+
+class TestDrain:
+    """Suite de testes para o modo drain (restart sem downtime)"""
+
+    @pytest.mark.asyncio
+    async def test_drain_sets_draining(self, manager):
+        """Testa que o drain marca o manager como draining"""
+        await manager.drain()
+        assert manager.draining is True
+
+    @pytest.mark.asyncio
+    async def test_drain_sends_hint_and_closes(self, manager, mock_websocket):
+        """Testa que cada conexão recebe a dica de reconexão e é fechada com 1012"""
+        mock_websocket.close = AsyncMock()
+        manager.active_connections.add(mock_websocket)
+
+        await manager.drain(reconnect_jitter_ms=500)
+
+        hint = json.loads(mock_websocket.send_text.call_args[0][0])
+        assert hint["type"] == "reconnect"
+        assert 0 <= hint["retry_after_ms"] <= 500
+        mock_websocket.close.assert_called_once_with(
+            code=CLOSE_CODE_SERVICE_RESTART, reason="Service restart"
+        )
+        assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_in_batches(self, manager, monkeypatch):
+        """Testa que as conexões são migradas em lotes escalonados"""
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+
+        for _ in range(5):
+            ws = MagicMock(spec=WebSocket)
+            ws.send_text = AsyncMock()
+            ws.close = AsyncMock()
+            manager.active_connections.add(ws)
+
+        await manager.drain(batch_size=2, batch_interval=0.25)
+
+        # 5 conexões em lotes de 2: três lotes, duas pausas entre eles
+        assert sleeps == [0.25, 0.25]
+        assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_tolerates_closed_connections(self, manager):
+        """Testa que falhas ao migrar uma conexão não interrompem o drain"""
+        ws_closed = MagicMock(spec=WebSocket)
+        ws_closed.send_text = AsyncMock(side_effect=Exception("Connection closed"))
+        ws_closed.close = AsyncMock()
+        ws_ok = MagicMock(spec=WebSocket)
+        ws_ok.send_text = AsyncMock()
+        ws_ok.close = AsyncMock()
+        manager.active_connections = {ws_closed, ws_ok}
+
+        await manager.drain()
+
+        ws_ok.close.assert_called_once()
+        assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_does_not_wait_for_stalled_consumer(self, manager):
+        """Testa que um consumidor travado não segura o drain além do flush_timeout"""
+        async def stall(message):
+            await asyncio.sleep(30)
+
+        stalled = MagicMock(spec=WebSocket)
+        stalled.send_text = AsyncMock(side_effect=stall)
+        stalled.close = AsyncMock()
+        others = []
+        for _ in range(3):
+            ws = MagicMock(spec=WebSocket)
+            ws.send_text = AsyncMock()
+            ws.close = AsyncMock()
+            others.append(ws)
+        manager.active_connections = {stalled, *others}
+
+        await asyncio.wait_for(manager.drain(batch_size=2, batch_interval=0, flush_timeout=0.2), timeout=2)
+
+        stalled.close.assert_called_once_with(code=CLOSE_CODE_SERVICE_RESTART, reason="Service restart")
+        for ws in others:
+            ws.close.assert_called_once()
+        assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_survives_client_disconnect(self, manager):
+        """Testa que um cliente com fila que desconecta durante o drain não o interrompe"""
+        async def slow(message):
+            await asyncio.sleep(0.05)
+
+        slow_ws = MagicMock(spec=WebSocket)
+        slow_ws.send_text = AsyncMock(side_effect=slow)
+        slow_ws.close = AsyncMock()
+        others = []
+        for _ in range(5):
+            ws = MagicMock(spec=WebSocket)
+            ws.send_text = AsyncMock()
+            ws.close = AsyncMock()
+            others.append(ws)
+        manager.active_connections = {slow_ws, *others}
+        for i in range(100):
+            await manager.broadcast(f"evento {i}")
+
+        async def client_leaves():
+            await asyncio.sleep(0.1)
+            manager.disconnect(slow_ws)
+
+        leaving = asyncio.create_task(client_leaves())
+        await asyncio.wait_for(manager.drain(flush_timeout=2), timeout=3)
+        await leaving
+
+        for ws in others:
+            hint = json.loads(ws.send_text.call_args[0][0])
+            assert hint["type"] == "reconnect"
+            ws.close.assert_called_once_with(code=CLOSE_CODE_SERVICE_RESTART, reason="Service restart")
+        assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_drain_deadline_closes_remaining(self, manager):
+        """Testa que, esgotado o prazo, as conexões restantes são fechadas de uma vez"""
+        connections = []
+        for _ in range(6):
+            ws = MagicMock(spec=WebSocket)
+            ws.send_text = AsyncMock()
+            ws.close = AsyncMock()
+            connections.append(ws)
+        manager.active_connections = set(connections)
+
+        # Seis lotes a cada 10s não cabem no prazo de 0.5s
+        await asyncio.wait_for(manager.drain(batch_size=1, batch_interval=10, timeout=0.5), timeout=2)
+
+        for ws in connections:
+            ws.close.assert_called_once()
+        assert len(manager.active_connections) == 0
+
+    @pytest.mark.asyncio
+    async def test_flush_without_pending(self, manager):
+        """Testa que o flush retorna imediatamente sem envios pendentes"""
+        assert await manager.flush(timeout=0.1) is True
@@ -0,0 +1,100 @@
+"""
+Testes para a janela de deduplicação
+Testa expiração por tempo, limite de tamanho e métricas
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Adicionar diretório backend ao path
+backend_path = Path(__file__).parent.parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from dedup import DedupWindow
+
+
+class FakeClock:
+    """Relógio controlado pelo teste"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def __call__(self):
+        return self.value
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestDedupWindow:
+    """Testes para a DedupWindow"""
+
+    def test_new_key_not_seen(self, clock):
+        """Testa que uma chave nova não é duplicata até ser registrada"""
+        window = DedupWindow(clock=clock)
+
+        assert window.seen("a") is False
+        window.add("a")
+        assert window.seen("a") is True
+        assert window.hits == 1
+        assert window.misses == 1
+
+    def test_key_expires_after_ttl(self, clock):
+        """Testa que a chave sai da janela após o TTL"""
+        window = DedupWindow(ttl=10.0, clock=clock)
+        window.add("a")
+
+        clock.value = 9.9
+        assert window.seen("a") is True
+        clock.value = 10.0
+        assert window.seen("a") is False
+        assert len(window) == 0
+
+    def test_size_bound_evicts_oldest(self, clock):
+        """Testa que a janela cheia descarta as chaves mais antigas"""
+        window = DedupWindow(max_size=3, clock=clock)
+        for key in ("a", "b", "c", "d"):
+            window.add(key)
+
+        assert len(window) == 3
+        assert window.seen("a") is False
+        assert window.seen("d") is True
+
+    def test_readd_keeps_original_expiry(self, clock):
+        """Testa que registrar de novo não estende a permanência da chave"""
+        window = DedupWindow(ttl=10.0, clock=clock)
+        window.add("a")
+        clock.value = 5.0
+        window.add("a")
+
+        clock.value = 10.0
+        assert window.seen("a") is False
+        assert window.misses == 1
+
+    def test_stats(self, clock):
+        """Testa taxa de acerto e estimativa de memória"""
+        window = DedupWindow(clock=clock)
+        assert window.stats()["hit_rate"] == 0.0
+
+        window.add("a")
+        window.seen("a")
+        stats = window.stats()
+
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 1
+        assert stats["memory_bytes"] > 0
+
+    def test_memory_returns_after_eviction(self, clock):
+        """Testa que a memória contabilizada das chaves volta ao expirar"""
+        window = DedupWindow(ttl=1.0, clock=clock)
+        for index in range(100):
+            window.add(f"key-{index}")
+
+        clock.value = 2.0
+        window.seen("other")
+        assert window._key_bytes == 0
@@ -9,18 +9,25 @@ from fastapi.websockets import WebSocket, WebSocketDisconnect
 import sys
 from pathlib import Path
 import json
+import uuid
 
 # Adicionar diretório backend ao path
 backend_path = Path(__file__).parent.parent.parent / 'backend'
 sys.path.insert(0, str(backend_path))
 
-from main import app
+from main import app, manager, stats_aggregator
 
 
 @pytest.fixture
 def client():
-    """Fixture que cria um TestClient"""
-    return TestClient(app)
+    """
+    Fixture que cria um TestClient.
+
+    Usado como context manager: todas as conexões do teste compartilham o
+    mesmo portal e, portanto, o mesmo event loop, como no servidor real.
+    """
+    with TestClient(app) as client:
+        yield client
 
 
 class TestWebSocketEndpoint:
@@ -78,6 +85,101 @@ class TestWebSocketEndpoint:
                 # Cliente 1 não deve receber (é o remetente)
                 # Timeout ou nenhuma mensagem
 
+    def test_websocket_publish_ack(self, client):
+        """Testa que o remetente recebe ack quando informa correlation_id"""
+        with client.websocket_connect("/ws/events") as ws1:
+            with client.websocket_connect("/ws/events") as ws2:
+                ws1.send_json({"message": "tracked", "correlation_id": "c-1"})
+
+                ack = ws1.receive_json()
+                assert ack["type"] == "ack"
+                assert ack["correlation_id"] == "c-1"
+                assert ack["recipients"] == 1
+                timings = ack["timings"]
+                assert timings["received"] <= timings["validated"] <= timings["fanout_started"]
+                assert timings["fanout_started"] <= timings["scheduled"] <= timings["fanout_done"]
+
+                # Assinante recebe o correlation_id e as marcas até a validação
+                event = ws2.receive_json()
+                assert event["correlation_id"] == "c-1"
+                assert list(event["timings"]) == ["received", "validated"]
+
+    def test_websocket_duplicate_publish_dropped(self, client):
+        """Testa que reenvios com a mesma idempotency_key não geram novo broadcast"""
+        key = f"idem-{uuid.uuid4()}"
+        with client.websocket_connect("/ws/events") as ws1:
+            with client.websocket_connect("/ws/events") as ws2:
+                ws1.send_json({"message": "once", "correlation_id": "c-a", "idempotency_key": key})
+                assert ws1.receive_json()["duplicate"] is False
+                assert ws2.receive_json()["message"] == "once"
+
+                # Reenvio (ex.: após reconexão) é confirmado sem fan-out
+                ws1.send_json({"message": "once", "correlation_id": "c-b", "idempotency_key": key})
+                ack = ws1.receive_json()
+                assert ack["correlation_id"] == "c-b"
+                assert ack["duplicate"] is True
+                assert ack["recipients"] == 0
+
+                ws1.send_json({"message": "next"})
+                assert ws2.receive_json()["message"] == "next"
+
+        assert client.get("/stats").json()["dedup"]["hits"] >= 1
+
+    def test_websocket_duplicate_with_invalid_correlation_id(self, client):
+        """Testa que um reenvio com correlation_id inválido recebe erro e não conta como duplicata"""
+        key = f"idem-{uuid.uuid4()}"
+        with client.websocket_connect("/ws/events") as ws1:
+            ws1.send_json({"message": "once", "correlation_id": "c-a", "idempotency_key": key})
+            assert ws1.receive_json()["duplicate"] is False
+            hits = client.get("/stats").json()["dedup"]["hits"]
+
+            for correlation_id in ("x" * 200, 42):
+                ws1.send_json({"message": "once", "correlation_id": correlation_id, "idempotency_key": key})
+                assert "error" in ws1.receive_json()
+
+        assert client.get("/stats").json()["dedup"]["hits"] == hits
+
+    def test_websocket_invalid_publish_does_not_consume_key(self, client):
+        """Testa que um envio inválido não bloqueia o reenvio corrigido"""
+        key = f"idem-{uuid.uuid4()}"
+        with client.websocket_connect("/ws/events") as ws1:
+            with client.websocket_connect("/ws/events") as ws2:
+                ws1.send_json({"message": "", "idempotency_key": key})
+                assert "error" in ws1.receive_json()
+
+                ws1.send_json({"message": "fixed", "idempotency_key": key})
+                assert ws2.receive_json()["message"] == "fixed"
+
+    def test_stats_endpoint(self, client):
+        """Testa o resumo de latência por estágio"""
+        with client.websocket_connect("/ws/events") as websocket:
+            websocket.send_json({"message": "tracked", "correlation_id": "c-2"})
+            websocket.receive_json()
+
+        data = client.get("/stats").json()
+        assert data["latency_ms"]["total"]["count"] >= 1
+        assert set(data["latency_ms"]) == {"validate", "serialize", "schedule", "fanout", "total"}
+
+    def test_stats_websocket(self, client, monkeypatch):
+        """Testa o stream de estatísticas em /ws/stats"""
+        monkeypatch.setattr(stats_aggregator, "interval", 0.01)
+
+        with client.websocket_connect("/ws/stats") as websocket:
+            snapshot = websocket.receive_json()
+
+        assert snapshot["type"] == "stats"
+        assert "messages_in_per_s" in snapshot
+        assert "loop_lag_ms" in snapshot
+
+    def test_stats_polling_does_not_sample(self, client):
+        """Testa que o polling de /stats não altera a janela das taxas de /ws/stats"""
+        history = list(stats_aggregator._history)
+
+        for _ in range(11):
+            assert client.get("/stats").json()["type"] == "stats"
+
+        assert list(stats_aggregator._history) == history
+
     def test_websocket_empty_message(self, client):
         """Testa envio de mensagem vazia"""
         with client.websocket_connect("/ws/events") as websocket:
@@ -95,3 +197,21 @@ class TestWebSocketEndpoint:
         assert "service" in data
         assert "active_connections" in data
         assert data["status"] == "online"
+
+    def test_health_endpoint(self, client):
+        """Testa endpoint de health check"""
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+
+    def test_websocket_refused_while_draining(self, client):
+        """Testa que novas conexões são recusadas durante o drain"""
+        manager.draining = True
+        try:
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                with client.websocket_connect("/ws/events"):
+                    pass
+            assert exc_info.value.code == 1012
+            assert client.get("/health").json()["status"] == "draining"
+        finally:
+            manager.draining = False
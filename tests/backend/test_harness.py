@@ -0,0 +1,136 @@
+"""
+Testes para o harness de benchmarks
+Testa os clientes simulados em memória contra a aplicação e o ConnectionManager
+"""
+
+import pytest
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Adicionar diretórios backend e benchmarks ao path
+root_path = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(root_path / 'backend'))
+sys.path.insert(0, str(root_path / 'benchmarks'))
+
+from connection_manager import CLOSE_CODE_POLICY_VIOLATION, ConnectionManager
+from harness import ClientPool, LinkProfile, SimulatedClient, SimulatedSocket, profiling
+from outbound import DEFAULT_MAX_CONTROL_SIZE
+from main import app, manager
+
+
+class TestLinkProfile:
+    """Testes para o LinkProfile"""
+
+    def test_delay_with_bandwidth(self):
+        """Testa que o atraso soma latência e tempo de transmissão"""
+        link = LinkProfile(latency=0.01, bandwidth=1000)
+        assert link.delay(500) == pytest.approx(0.51)
+
+    def test_no_delay_by_default(self):
+        """Testa que o perfil padrão não atrasa entregas"""
+        assert LinkProfile().delay(10_000) == 0.0
+
+
+class TestClientPool:
+    """Testes para os clientes simulados contra /ws/events"""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_other_clients(self):
+        """Testa publicação, fan-out e ack pelo endpoint real"""
+        async with ClientPool(app, 3, keep_messages=True) as pool:
+            publisher, *subscribers = pool.clients
+            publisher.publish({"message": "harness", "correlation_id": "h-1"})
+
+            assert await pool.wait_delivered(3, timeout=5)
+            assert json.loads(publisher.messages[0])["type"] == "ack"
+            for client in subscribers:
+                assert json.loads(client.messages[0])["message"] == "harness"
+
+        assert manager.get_connection_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_injected_failure_drops_connection(self):
+        """Testa que a falha injetada remove o cliente do pool do servidor"""
+        links = {1: LinkProfile(fail_after=0)}
+        async with ClientPool(app, 3, link=lambda index: links.get(index, LinkProfile())) as pool:
+            pool.clients[0].publish({"message": "boom"})
+
+            assert await pool.wait_delivered(1, timeout=5)
+            await manager.flush()
+            assert pool.failed() == 1
+            assert manager.get_connection_count() == 2
+
+    @pytest.mark.asyncio
+    async def test_flooding_client_that_never_reads_is_closed(self):
+        """Testa que respostas não lidas não crescem sem limite: a conexão é fechada com 1008"""
+        client = SimulatedClient(app, link=LinkProfile(latency=10))
+        await client.connect()
+
+        # Cada frame inválido gera uma resposta de erro na lane de controle
+        for _ in range(DEFAULT_MAX_CONTROL_SIZE * 4):
+            client.send_text("not json")
+        await asyncio.wait_for(client._task, timeout=5)
+
+        assert client.close_code == CLOSE_CODE_POLICY_VIOLATION
+        assert manager.get_connection_count() == 0
+        assert manager.get_queue_stats()["total"] == 0
+        await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_slow_client_latency(self):
+        """Testa que a latência simulada atrasa apenas o cliente lento"""
+        links = {2: LinkProfile(latency=0.05)}
+        async with ClientPool(app, 3, link=lambda index: links.get(index, LinkProfile())) as pool:
+            pool.clients[0].publish({"message": "tick"})
+
+            assert await pool.wait_delivered(1, timeout=5)
+            assert pool.clients[1].link.delivered == 1
+            assert pool.clients[2].link.delivered == 0
+            assert await pool.wait_delivered(2, timeout=5)
+
+
+class TestSimulatedSocket:
+    """Testes para o SimulatedSocket com o ConnectionManager"""
+
+    @pytest.mark.asyncio
+    async def test_manager_delivery(self):
+        """Testa entrega pelo ConnectionManager sem a aplicação ASGI"""
+        local = ConnectionManager()
+        ws = SimulatedSocket(keep_messages=True)
+        await local.connect(ws)
+
+        await local.publish("event")
+        await local.flush()
+
+        assert ws.messages == ["event"]
+        assert ws.link.bytes == len("event")
+
+    @pytest.mark.asyncio
+    async def test_manager_drops_failing_socket(self):
+        """Testa que uma falha de envio desconecta o socket"""
+        local = ConnectionManager()
+        await local.connect(SimulatedSocket(LinkProfile(fail_rate=1.0, seed=7)))
+
+        await local.publish("event")
+        await local.flush()
+
+        assert local.get_connection_count() == 0
+
+
+class TestProfiling:
+    """Testes para o hook de profiling"""
+
+    def test_cprofile_to_file(self, tmp_path):
+        """Testa que o cProfile grava o perfil no arquivo pedido"""
+        output = tmp_path / "fanout.prof"
+        with profiling("cprofile", str(output)):
+            sum(range(1000))
+        assert output.stat().st_size > 0
+
+    def test_unknown_profiler(self):
+        """Testa erro para profiler desconhecido"""
+        with pytest.raises(RuntimeError):
+            with profiling("perf"):
+                pass
@@ -0,0 +1,102 @@
+"""
+Testes para as métricas de latência
+Testa as marcas de tempo por estágio e o resumo em percentis
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório backend ao path
+backend_path = Path(__file__).parent.parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from metrics import LatencyTracker, StageTimer, percentile, summarize
+
+
+class TestStageTimer:
+    """Testes para o StageTimer"""
+
+    def test_received_is_origin(self):
+        """Testa que os deslocamentos são relativos ao recebimento"""
+        timer = StageTimer(received=10.0)
+        timer.marks["validated"] = 10.002
+
+        offsets = timer.offsets_ms()
+
+        assert offsets["received"] == 0.0
+        assert offsets["validated"] == 2.0
+
+    def test_marks_are_monotonic(self):
+        """Testa que estágios marcados em sequência não andam para trás"""
+        timer = StageTimer()
+        timer.mark("validated")
+        timer.mark("fanout_started")
+        timer.mark("fanout_done")
+
+        offsets = timer.offsets_ms()
+
+        assert list(offsets) == ["received", "validated", "fanout_started", "fanout_done"]
+        assert offsets["validated"] <= offsets["fanout_started"] <= offsets["fanout_done"]
+
+
+class TestPercentiles:
+    """Testes para o cálculo de percentis"""
+
+    def test_percentile_nearest_rank(self):
+        """Testa percentil por nearest-rank"""
+        values = list(range(1, 101))
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile(values, 1.0) == 100
+
+    def test_summarize_empty(self):
+        """Testa resumo sem amostras"""
+        assert summarize([])["count"] == 0
+
+    def test_summarize(self):
+        """Testa resumo com amostras fora de ordem"""
+        summary = summarize([3.0, 1.0, 2.0])
+        assert summary["count"] == 3
+        assert summary["avg"] == 2.0
+        assert summary["max"] == 3.0
+
+
+class TestLatencyTracker:
+    """Testes para o LatencyTracker"""
+
+    def test_record_spans(self):
+        """Testa que cada publicação gera uma amostra por intervalo"""
+        tracker = LatencyTracker()
+        timer = StageTimer(received=0.0)
+        timer.marks.update(validated=0.001, fanout_started=0.0015, scheduled=0.002, fanout_done=0.004)
+
+        tracker.record(timer)
+        summary = tracker.summary()
+
+        assert summary["validate"]["p50"] == 1.0
+        assert summary["serialize"]["p50"] == 0.5
+        assert summary["schedule"]["p50"] == 0.5
+        assert summary["fanout"]["p50"] == 2.0
+        assert summary["total"]["p50"] == 4.0
+
+    def test_incomplete_timer(self):
+        """Testa que intervalos sem marca final são ignorados"""
+        tracker = LatencyTracker()
+        timer = StageTimer(received=0.0)
+        timer.marks["validated"] = 0.001
+
+        tracker.record(timer)
+        summary = tracker.summary()
+
+        assert summary["validate"]["count"] == 1
+        assert summary["total"]["count"] == 0
+
+    def test_window_is_bounded(self):
+        """Testa que a janela mantém apenas as amostras mais recentes"""
+        tracker = LatencyTracker(window=10)
+        for _ in range(50):
+            timer = StageTimer(received=0.0)
+            timer.marks["validated"] = 0.001
+            tracker.record(timer)
+
+        assert tracker.summary()["validate"]["count"] == 10
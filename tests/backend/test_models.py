@@ -13,7 +13,7 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent.parent / 'backend'
 sys.path.insert(0, str(backend_path))
 
-from models import IncomingMessage, WebSocketMessage
+from models import IncomingMessage, PublishAck, WebSocketMessage
 
 
 class TestIncomingMessage:
@@ -55,6 +55,37 @@ class TestIncomingMessage:
         assert msg.message == "test"
         assert not hasattr(msg, 'extra_field')
 
+    def test_default_priority(self):
+        """Testa que a prioridade padrão é realtime"""
+        msg = IncomingMessage(message="test")
+        assert msg.priority == "realtime"
+
+    def test_bulk_priority(self):
+        """Testa mensagem com prioridade bulk"""
+        msg = IncomingMessage(message="test", priority="bulk")
+        assert msg.priority == "bulk"
+
+    def test_correlation_id(self):
+        """Testa mensagem com ID de correlação"""
+        msg = IncomingMessage(message="test", correlation_id="abc-1")
+        assert msg.correlation_id == "abc-1"
+
+    def test_correlation_id_too_long(self):
+        """Testa limite de tamanho do ID de correlação"""
+        with pytest.raises(ValidationError):
+            IncomingMessage(message="test", correlation_id="x" * 200)
+
+    def test_idempotency_key_too_long(self):
+        """Testa limite de tamanho da chave de idempotência"""
+        assert IncomingMessage(message="test").idempotency_key is None
+        with pytest.raises(ValidationError):
+            IncomingMessage(message="test", idempotency_key="k" * 200)
+
+    def test_control_priority_reserved(self):
+        """Testa que clientes não podem usar a lane de controle"""
+        with pytest.raises(ValidationError):
+            IncomingMessage(message="test", priority="control")
+
 
 class TestWebSocketMessage:
     """Testes para o modelo WebSocketMessage"""
@@ -78,6 +109,14 @@ class TestWebSocketMessage:
         assert msg.message == "Test message"
         # Timestamp deve ser gerado automaticamente se não fornecido
 
+    def test_auto_timestamp_is_utc(self):
+        """Testa que o timestamp gerado tem offset UTC explícito"""
+        msg = WebSocketMessage(message="Test message")
+        parsed = datetime.fromisoformat(msg.timestamp)
+
+        assert parsed.utcoffset() is not None
+        assert parsed.utcoffset().total_seconds() == 0
+
     def test_missing_message(self):
         """Testa ausência do campo message"""
         data = {"timestamp": datetime.now().isoformat()}
@@ -103,3 +142,17 @@ class TestWebSocketMessage:
         
         assert msg.message == long_msg
         assert len(msg.message) == 10000
+
+
+class TestPublishAck:
+    """Testes para o modelo PublishAck"""
+
+    def test_ack_serialization(self):
+        """Testa serialização do ack"""
+        ack = PublishAck(correlation_id="abc", recipients=2, timings={"received": 0.0})
+        data = ack.model_dump()
+
+        assert data["type"] == "ack"
+        assert data["correlation_id"] == "abc"
+        assert data["recipients"] == 2
+        assert "timestamp" in data
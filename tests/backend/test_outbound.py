@@ -0,0 +1,215 @@
+"""
+Testes para a Outbox
+Testa as lanes de prioridade e o round-robin ponderado do caminho de saída
+"""
+
+import pytest
+from fastapi import WebSocket
+from unittest.mock import AsyncMock, MagicMock
+import sys
+from pathlib import Path
+
+# Adicionar diretório backend ao path
+backend_path = Path(__file__).parent.parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from metrics import TrafficCounters
+from outbound import Outbox, Priority
+
+
+@pytest.fixture
+def mock_websocket():
+    """Fixture que cria um mock de WebSocket"""
+    ws = MagicMock(spec=WebSocket)
+    ws.send_text = AsyncMock()
+    return ws
+
+
+def sent_messages(ws):
+    return [call.args[0] for call in ws.send_text.call_args_list]
+
+
+class TestOutbox:
+    """Suite de testes para a Outbox"""
+
+    @pytest.mark.asyncio
+    async def test_put_sends(self, mock_websocket):
+        """Testa que uma mensagem enfileirada é enviada pelo writer"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+
+        outbox.put("hello")
+        await outbox.join()
+
+        mock_websocket.send_text.assert_called_once_with("hello")
+        assert len(outbox) == 0
+
+    @pytest.mark.asyncio
+    async def test_fifo_within_lane(self, mock_websocket):
+        """Testa que a ordem é preservada dentro de uma lane"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+
+        for i in range(5):
+            outbox.put(str(i))
+        await outbox.join()
+
+        assert sent_messages(mock_websocket) == ["0", "1", "2", "3", "4"]
+
+    @pytest.mark.asyncio
+    async def test_control_first(self, mock_websocket):
+        """Testa que a lane de controle é servida antes das demais"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+
+        outbox.put("bulk", Priority.BULK)
+        outbox.put("realtime", Priority.REALTIME)
+        outbox.put("control", Priority.CONTROL)
+        await outbox.join()
+
+        assert sent_messages(mock_websocket) == ["control", "realtime", "bulk"]
+
+    @pytest.mark.asyncio
+    async def test_weighted_fairness(self, mock_websocket):
+        """Testa que lanes inferiores recebem sua cota mesmo com lanes superiores cheias"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock(), weights=(2, 1, 1))
+
+        for i in range(4):
+            outbox.put(f"c{i}", Priority.CONTROL)
+            outbox.put(f"r{i}", Priority.REALTIME)
+            outbox.put(f"b{i}", Priority.BULK)
+        await outbox.join()
+
+        sent = sent_messages(mock_websocket)
+        # Primeiro ciclo: 2 de controle, 1 realtime, 1 bulk
+        assert sent[:4] == ["c0", "c1", "r0", "b0"]
+        assert len(sent) == 12
+
+    @pytest.mark.asyncio
+    async def test_bounded_lane_drops_oldest(self, mock_websocket):
+        """Testa que lanes limitadas descartam a mensagem mais antiga"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock(), max_lane_size=2)
+
+        # Enfileirar sem ceder o loop: o writer ainda não rodou
+        outbox.put("a", Priority.BULK)
+        outbox.put("b", Priority.BULK)
+        outbox.put("c", Priority.BULK)
+        await outbox.join()
+
+        assert sent_messages(mock_websocket) == ["b", "c"]
+        assert outbox.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_control_lane_never_drops(self, mock_websocket):
+        """Testa que a lane de controle não descarta mensagens nem usa o limite das lanes de eventos"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock(), max_lane_size=1)
+
+        for i in range(3):
+            outbox.put(str(i), Priority.CONTROL)
+        await outbox.join()
+
+        assert sent_messages(mock_websocket) == ["0", "1", "2"]
+        assert outbox.dropped == 0
+
+    @pytest.mark.asyncio
+    async def test_control_lane_full_refuses(self, mock_websocket):
+        """Testa que a lane de controle cheia recusa a mensagem em vez de crescer"""
+        counters = TrafficCounters()
+        outbox = Outbox(mock_websocket, on_error=MagicMock(), max_control_size=2, counters=counters)
+
+        assert outbox.put("a", Priority.CONTROL)
+        assert outbox.put("b", Priority.CONTROL)
+        assert not outbox.put("c", Priority.CONTROL)
+
+        assert len(outbox) == 2
+        assert counters.queued == 2
+        outbox.close()
+
+    @pytest.mark.asyncio
+    async def test_send_error_calls_on_error(self, mock_websocket):
+        """Testa que uma falha de envio descarta a fila e notifica o dono"""
+        mock_websocket.send_text = AsyncMock(side_effect=Exception("Connection error"))
+        on_error = MagicMock()
+        outbox = Outbox(mock_websocket, on_error=on_error)
+
+        outbox.put("a")
+        outbox.put("b")
+        await outbox.join()
+
+        on_error.assert_called_once_with(mock_websocket)
+        assert len(outbox) == 0
+
+    @pytest.mark.asyncio
+    async def test_close_discards_pending(self, mock_websocket):
+        """Testa que close descarta mensagens ainda não enviadas"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+
+        outbox.put("a")
+        outbox.close()
+        await outbox.join()
+
+        mock_websocket.send_text.assert_not_called()
+
+
+class TestOutboxMemory:
+    """Testes para a contabilidade de memória e filas da Outbox"""
+
+    def test_slots(self, mock_websocket):
+        """Testa que a Outbox não tem __dict__ por instância"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+        assert not hasattr(outbox, "__dict__")
+
+    @pytest.mark.asyncio
+    async def test_lanes_released_when_idle(self, mock_websocket):
+        """Testa que as lanes são liberadas quando o writer esvazia a fila"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+        assert outbox.lanes == [None, None, None]
+
+        outbox.put("a", Priority.BULK)
+        assert outbox.lanes[Priority.BULK] is not None
+        await outbox.join()
+
+        assert outbox.lanes == [None, None, None]
+        assert outbox.memory_size() == Outbox.idle_memory_size()
+
+    @pytest.mark.asyncio
+    async def test_memory_grows_with_queue(self, mock_websocket):
+        """Testa que mensagens enfileiradas entram na estimativa"""
+        outbox = Outbox(mock_websocket, on_error=MagicMock())
+
+        outbox.put("x" * 1000)
+
+        assert outbox.memory_size() > Outbox.idle_memory_size() + 1000
+        await outbox.join()
+
+    @pytest.mark.asyncio
+    async def test_counters_track_queue(self, mock_websocket):
+        """Testa a contabilidade incremental de filas nos contadores"""
+        counters = TrafficCounters()
+        outbox = Outbox(mock_websocket, on_error=MagicMock(), max_lane_size=2, counters=counters)
+
+        for message in ("a", "b", "c"):
+            outbox.put(message, Priority.BULK)
+
+        assert counters.queued == 2
+        assert counters.queued_bytes == outbox.memory_size() - outbox.structure_size()
+        assert counters.dropped == 1
+        assert outbox in counters.backlogged
+
+        await outbox.join()
+
+        assert counters.queued == 0
+        assert counters.queued_bytes == 0
+        assert counters.messages_out == 2
+        assert outbox not in counters.backlogged
+
+    @pytest.mark.asyncio
+    async def test_close_resets_counters(self, mock_websocket):
+        """Testa que descartar a fila atualiza os contadores"""
+        counters = TrafficCounters()
+        outbox = Outbox(mock_websocket, on_error=MagicMock(), counters=counters)
+
+        outbox.put("a")
+        outbox.put("b")
+        outbox.close()
+
+        assert counters.queued == 0
+        assert counters.queued_bytes == 0
+        assert outbox not in counters.backlogged
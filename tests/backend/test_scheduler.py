@@ -0,0 +1,232 @@
+"""
+Testes para o BroadcastScheduler
+Testa o fan-out em fatias e o round-robin entre publicadores
+"""
+
+import pytest
+import asyncio
+from fastapi import WebSocket
+from unittest.mock import AsyncMock, MagicMock
+import sys
+from pathlib import Path
+
+# Adicionar diretório backend ao path
+backend_path = Path(__file__).parent.parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+from connection_manager import ConnectionManager
+from metrics import StageTimer
+
+
+def make_websocket():
+    ws = MagicMock(spec=WebSocket)
+    ws.send_text = AsyncMock()
+    ws.accept = AsyncMock()
+    return ws
+
+
+async def connect_many(manager, count):
+    connections = [make_websocket() for _ in range(count)]
+    for ws in connections:
+        await manager.connect(ws)
+    return connections
+
+
+class TestBroadcastScheduler:
+    """Testes para o BroadcastScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_publish_excludes_sender(self):
+        """Testa que o publish entrega a todos exceto o remetente"""
+        manager = ConnectionManager()
+        sender, *others = await connect_many(manager, 4)
+
+        recipients = await manager.publish("event", sender=sender)
+        await manager.flush()
+
+        assert recipients == 3
+        sender.send_text.assert_not_called()
+        for ws in others:
+            ws.send_text.assert_called_once_with("event")
+
+    @pytest.mark.asyncio
+    async def test_fan_out_in_slices(self):
+        """Testa que o fan-out devolve o controle ao event loop entre fatias"""
+        manager = ConnectionManager(slice_size=2)
+        await connect_many(manager, 5)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        ticks = 0
+        recipients = await manager.publish("event")
+        task.cancel()
+
+        assert recipients == 5
+        assert manager.scheduler.slices == 3
+        assert ticks >= 2
+
+    @pytest.mark.asyncio
+    async def test_slice_bounded_with_many_publishers(self):
+        """Testa que fatias não passam de slice_size envios com mais publicadores que slice_size"""
+        manager = ConnectionManager(slice_size=4)
+        connections = await connect_many(manager, 3)
+        enqueued = 0
+        largest = 0
+        fan_out = manager.fan_out
+
+        def counting_fan_out(*args, **kwargs):
+            nonlocal enqueued, largest
+            count = fan_out(*args, **kwargs)
+            enqueued += count
+            largest = max(largest, enqueued)
+            return count
+
+        async def ticker():
+            nonlocal enqueued
+            while True:
+                enqueued = 0
+                await asyncio.sleep(0)
+
+        manager.fan_out = counting_fan_out
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        results = await asyncio.gather(*(
+            manager.publish(f"event {i}", publisher=f"pub-{i}") for i in range(10)
+        ))
+        task.cancel()
+        await manager.flush()
+
+        assert results == [3] * 10
+        assert largest <= 4
+        assert manager.scheduler.completed == 10
+        for ws in connections:
+            assert ws.send_text.call_count == 10
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_publishers(self):
+        """Testa que um publicador leve não espera a fila do publicador intenso"""
+        manager = ConnectionManager()
+        heavy, light = await connect_many(manager, 2)
+        finished = []
+
+        for i in range(5):
+            future = manager.scheduler.submit(f"heavy {i}", sender=heavy)
+            future.add_done_callback(lambda _, i=i: finished.append(f"heavy {i}"))
+        future = manager.scheduler.submit("light", sender=light)
+        future.add_done_callback(lambda _: finished.append("light"))
+
+        await manager.scheduler.join()
+        await asyncio.sleep(0)
+
+        assert finished[:2] == ["heavy 0", "light"]
+        assert len(finished) == 6
+        assert manager.scheduler.completed == 6
+
+    @pytest.mark.asyncio
+    async def test_light_publisher_not_blocked_by_heavy_fan_out(self):
+        """Testa que um publicador leve que chega durante o fan-out intenso termina antes do próximo job intenso"""
+        manager = ConnectionManager(slice_size=1)
+        heavy, light, *_ = await connect_many(manager, 10)
+        finished = []
+
+        def record(name):
+            return lambda _: finished.append((name, manager.scheduler.slices))
+
+        for i in range(5):
+            manager.scheduler.submit(f"heavy {i}", sender=heavy).add_done_callback(record(f"heavy {i}"))
+        # O primeiro job intenso já está no meio do pool quando o leve chega
+        for _ in range(4):
+            await asyncio.sleep(0)
+        submitted_at = manager.scheduler.slices
+        manager.scheduler.submit("light", sender=light).add_done_callback(record("light"))
+
+        await manager.scheduler.join()
+        await asyncio.sleep(0)
+
+        names = [name for name, _ in finished]
+        assert names.index("light") < names.index("heavy 1")
+        # Sem esperar o job intenso em curso: uma fatia por conexão do próprio pool
+        assert dict(finished)["light"] - submitted_at <= 10
+
+    @pytest.mark.asyncio
+    async def test_aligned_jobs_share_slices(self):
+        """Testa que jobs que entram juntos percorrem as mesmas conexões na mesma fatia"""
+        manager = ConnectionManager(slice_size=4)
+        await connect_many(manager, 8)
+        calls = []
+        fan_out = manager.fan_out
+
+        def spy(chunk, message, *args):
+            calls.append((manager.scheduler.slices, message, tuple(chunk)))
+            return fan_out(chunk, message, *args)
+
+        manager.fan_out = spy
+        futures = [manager.scheduler.submit(f"event {i}", publisher=i) for i in range(2)]
+        await manager.scheduler.join()
+
+        assert [f.result() for f in futures] == [8, 8]
+        # 2 jobs x 8 conexões em fatias de 4 envios, a mesma metade por fatia
+        assert manager.scheduler.slices == 4
+        for slice_index in range(4):
+            sent = [(message, chunk) for index, message, chunk in calls if index == slice_index]
+            assert [message for message, _ in sent] == ["event 0", "event 1"]
+            assert sent[0][1] == sent[1][1] and len(sent[0][1]) == 2
+
+    @pytest.mark.asyncio
+    async def test_publisher_key_overrides_sender(self):
+        """Testa que jobs com a mesma chave de publicador dividem a mesma fila"""
+        manager = ConnectionManager()
+        ws1, ws2 = await connect_many(manager, 2)
+
+        manager.scheduler.submit("a", sender=ws1, publisher="tenant-1")
+        manager.scheduler.submit("b", sender=ws2, publisher="tenant-1")
+
+        assert manager.scheduler.stats()["publishers"] == 1
+        assert manager.scheduler.stats()["pending_jobs"] == 2
+        await manager.scheduler.join()
+        assert manager.scheduler.stats()["pending_jobs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_disconnected_during_fan_out_skipped(self):
+        """Testa que conexões removidas durante o fan-out não são contadas"""
+        manager = ConnectionManager(slice_size=1)
+        connections = await connect_many(manager, 3)
+
+        future = manager.scheduler.submit("event")
+        # Primeira fatia atende uma conexão; as demais saem antes da próxima
+        await asyncio.sleep(0)
+        for ws in connections:
+            manager.disconnect(ws)
+
+        assert await future == 1
+
+    @pytest.mark.asyncio
+    async def test_timer_marks_scheduled(self):
+        """Testa que o início da execução do job é marcado no timer"""
+        manager = ConnectionManager()
+        await connect_many(manager, 1)
+        timer = StageTimer()
+        timer.mark("fanout_started")
+
+        await manager.publish("event", timer=timer)
+
+        assert timer.marks["fanout_started"] <= timer.marks["scheduled"]
+
+    @pytest.mark.asyncio
+    async def test_flush_waits_for_scheduled_jobs(self):
+        """Testa que o flush aguarda os broadcasts ainda agendados"""
+        manager = ConnectionManager(slice_size=1)
+        connections = await connect_many(manager, 3)
+
+        manager.scheduler.submit("event")
+        assert await manager.flush() is True
+
+        for ws in connections:
+            ws.send_text.assert_called_once_with("event")
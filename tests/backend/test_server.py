@@ -0,0 +1,171 @@
+"""
+Testes para o launcher de produção
+Testa a configuração por variáveis de ambiente e o socket compartilhado
+"""
+
+import pytest
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+from pathlib import Path
+
+# Adicionar diretório backend ao path
+backend_path = Path(__file__).parent.parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+import server
+from server import ServerSettings, build_config, create_listen_socket, resolve_http, resolve_loop, supervise
+
+
+class TestServerSettings:
+    """Testes para a leitura de configuração"""
+
+    def test_defaults(self, monkeypatch):
+        """Testa valores padrão sem variáveis de ambiente"""
+        for name in ("HOST", "PORT", "DRAIN_BATCH_SIZE", "DRAIN_TIMEOUT", "GRACEFUL_TIMEOUT"):
+            monkeypatch.delenv(name, raising=False)
+
+        settings = ServerSettings.from_env()
+
+        assert settings.host == "0.0.0.0"
+        assert settings.port == 8000
+        assert settings.drain_batch_size == 100
+        assert settings.drain_timeout + settings.graceful_timeout < 30
+
+    def test_from_env(self, monkeypatch):
+        """Testa leitura das variáveis de ambiente"""
+        monkeypatch.setenv("PORT", "9000")
+        monkeypatch.setenv("DRAIN_BATCH_SIZE", "25")
+        monkeypatch.setenv("DRAIN_BATCH_INTERVAL", "0.1")
+
+        settings = ServerSettings.from_env()
+
+        assert settings.port == 9000
+        assert settings.drain_batch_size == 25
+        assert settings.drain_batch_interval == 0.1
+
+    def test_empty_env_keeps_default(self, monkeypatch):
+        """Testa que variáveis vazias mantêm o padrão"""
+        monkeypatch.setenv("PORT", "")
+        assert ServerSettings.from_env().port == 8000
+
+    def test_websocket_limits_from_env(self, monkeypatch):
+        """Testa leitura dos limites de WebSocket e tuning de rede"""
+        monkeypatch.setenv("WORKERS", "4")
+        monkeypatch.setenv("WS_MAX_SIZE", "1024")
+        monkeypatch.setenv("WS_MAX_QUEUE", "8")
+        monkeypatch.setenv("WS_PING_INTERVAL", "0")
+        monkeypatch.setenv("WS_PER_MESSAGE_DEFLATE", "true")
+        monkeypatch.setenv("BACKLOG", "4096")
+
+        settings = ServerSettings.from_env()
+
+        assert settings.workers == 4
+        assert settings.ws_max_size == 1024
+        assert settings.ws_max_queue == 8
+        assert settings.ws_ping_interval is None
+        assert settings.ws_per_message_deflate is True
+        assert settings.backlog == 4096
+
+
+class TestLoopSelection:
+    """Testes para a seleção explícita de event loop e parser HTTP"""
+
+    def test_auto_prefers_uvloop(self, monkeypatch):
+        """Testa que "auto" escolhe uvloop/httptools quando instalados"""
+        monkeypatch.setattr(server, "_is_installed", lambda module: True)
+        assert resolve_loop("auto") == "uvloop"
+        assert resolve_http("auto") == "httptools"
+
+    def test_auto_falls_back(self, monkeypatch):
+        """Testa fallback para asyncio/h11 sem as dependências opcionais"""
+        monkeypatch.setattr(server, "_is_installed", lambda module: False)
+        assert resolve_loop("auto") == "asyncio"
+        assert resolve_http("auto") == "h11"
+
+    def test_explicit_missing_dependency(self, monkeypatch):
+        """Testa que pedir uvloop sem o pacote instalado falha explicitamente"""
+        monkeypatch.setattr(server, "_is_installed", lambda module: False)
+        with pytest.raises(RuntimeError):
+            resolve_loop("uvloop")
+        with pytest.raises(RuntimeError):
+            resolve_http("httptools")
+
+    def test_invalid_value(self):
+        """Testa rejeição de valores desconhecidos"""
+        with pytest.raises(RuntimeError):
+            resolve_loop("trio")
+
+    def test_build_config(self):
+        """Testa que a configuração do uvicorn reflete as settings"""
+        settings = ServerSettings(loop="asyncio", http="h11", ws_max_size=2048, timeout_keep_alive=30)
+
+        config = build_config(object(), settings)
+
+        assert config.loop == "asyncio"
+        assert config.http == "h11"
+        assert config.ws_max_size == 2048
+        assert config.timeout_keep_alive == 30
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT indisponível")
+class TestListenSocket:
+    """Testes para o socket de escuta com SO_REUSEPORT"""
+
+    def test_reuseport_enabled(self):
+        """Testa que o socket é criado com SO_REUSEPORT"""
+        sock = create_listen_socket("127.0.0.1", 0)
+        try:
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT) != 0
+        finally:
+            sock.close()
+
+    def test_two_processes_share_port(self):
+        """Testa que um segundo socket (processo novo) faz bind na mesma porta"""
+        old = create_listen_socket("127.0.0.1", 0)
+        old.listen()
+        port = old.getsockname()[1]
+        try:
+            new = create_listen_socket("127.0.0.1", port)
+            new.listen()
+            assert new.getsockname()[1] == port
+            new.close()
+        finally:
+            old.close()
+
+
+class TestSupervisor:
+    """Testes para o supervisor de workers"""
+
+    def test_split_broadcast_requires_opt_in(self, monkeypatch):
+        """Testa que WORKERS > 1 é recusado sem ALLOW_SPLIT_BROADCAST"""
+        monkeypatch.setenv("WORKERS", "2")
+        monkeypatch.delenv("ALLOW_SPLIT_BROADCAST", raising=False)
+        with pytest.raises(RuntimeError):
+            supervise(ServerSettings.from_env())
+
+        monkeypatch.setenv("ALLOW_SPLIT_BROADCAST", "1")
+        assert ServerSettings.from_env().allow_split_broadcast is True
+
+    def test_startup_failure_exits_non_zero(self):
+        """Testa que um worker que morre ao iniciar encerra o supervisor com erro"""
+        settings = ServerSettings(workers=2, allow_split_broadcast=True)
+        assert supervise(settings, target=os._exit, args=(3,)) == 1
+
+    def test_crashed_worker_is_restarted(self, monkeypatch, caplog):
+        """Testa que um worker que morre após iniciar é reiniciado até o sinal de parada"""
+        monkeypatch.setattr(server, "WORKER_MIN_UPTIME", 0)
+        timer = threading.Timer(1.5, os.kill, args=(os.getpid(), signal.SIGTERM))
+        timer.start()
+        previous = signal.getsignal(signal.SIGTERM)
+
+        with caplog.at_level(logging.WARNING, logger="server"):
+            code = supervise(ServerSettings(workers=1), target=os._exit, args=(3,))
+        timer.join()
+
+        assert code == 1
+        assert "Reiniciando worker-0" in caplog.text
+        assert signal.getsignal(signal.SIGTERM) is previous
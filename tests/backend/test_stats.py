@@ -0,0 +1,189 @@
+"""
+Testes para o StatsAggregator
+Testa o cálculo das taxas e a distribuição do snapshot para os viewers
+"""
+
+import pytest
+import asyncio
+import json
+from fastapi import WebSocket
+from unittest.mock import AsyncMock, MagicMock
+import sys
+from pathlib import Path
+
+# Adicionar diretório backend ao path
+backend_path = Path(__file__).parent.parent.parent / 'backend'
+sys.path.insert(0, str(backend_path))
+
+import stats
+from connection_manager import ConnectionManager
+from metrics import LatencyTracker
+from stats import StatsAggregator
+
+
+@pytest.fixture
+def manager():
+    """Fixture que cria um novo ConnectionManager"""
+    return ConnectionManager()
+
+
+@pytest.fixture
+def aggregator(manager):
+    """Fixture que cria um agregador com intervalo curto"""
+    return StatsAggregator(manager, LatencyTracker(), interval=0.01)
+
+
+def make_viewer():
+    ws = MagicMock(spec=WebSocket)
+    ws.send_text = AsyncMock()
+    return ws
+
+
+async def wait_stopped(aggregator):
+    """Aguarda a task de tick terminar após a saída do último viewer"""
+    await asyncio.wait_for(aggregator._task, timeout=1)
+
+
+class TestStatsAggregator:
+    """Suite de testes para o StatsAggregator"""
+
+    def test_snapshot_fields(self, aggregator):
+        """Testa os campos do snapshot"""
+        snapshot = aggregator.snapshot()
+
+        for field in ("connections", "messages_in_per_s", "messages_out_per_s",
+                      "bytes_in_per_s", "bytes_out_per_s", "queue", "latency_ms", "loop_lag_ms"):
+            assert field in snapshot
+        assert snapshot["type"] == "stats"
+
+    def test_rates_from_window(self, aggregator, manager, monkeypatch):
+        """Testa que as taxas são derivadas da janela de amostras"""
+        clock = iter([0.0, 2.0])
+        monkeypatch.setattr(stats, "now", lambda: next(clock))
+
+        aggregator.sample()
+        for _ in range(10):
+            manager.counters.record_in(50)
+        manager.counters.record_out(100)
+        aggregator.sample()
+
+        snapshot = aggregator.snapshot()
+        assert snapshot["messages_in_per_s"] == 5.0
+        assert snapshot["bytes_in_per_s"] == 250.0
+        assert snapshot["messages_out_per_s"] == 0.5
+        assert snapshot["bytes_out_per_s"] == 50.0
+
+    def test_polling_does_not_change_tick_rates(self, aggregator, manager, monkeypatch):
+        """Testa que consultas avulsas não registram amostras na janela dos ticks"""
+        clock = iter([0.0, 2.0] + [2.0 + i * 0.001 for i in range(1, 12)])
+        monkeypatch.setattr(stats, "now", lambda: next(clock))
+
+        aggregator.sample()
+        for _ in range(10):
+            manager.counters.record_in(50)
+        rates = json.loads(aggregator.tick())["messages_in_per_s"]
+
+        for _ in range(11):
+            aggregator.current()
+
+        assert rates == 5.0
+        assert len(aggregator._history) == 2
+        assert aggregator.snapshot()["messages_in_per_s"] == rates
+
+    def test_current_includes_live_sample(self, aggregator, manager, monkeypatch):
+        """Testa que, sem ticks ativos, a consulta calcula as taxas até o instante atual"""
+        clock = iter([0.0, 4.0])
+        monkeypatch.setattr(stats, "now", lambda: next(clock))
+
+        aggregator.sample()
+        for _ in range(8):
+            manager.counters.record_in(10)
+
+        assert json.loads(aggregator.current())["messages_in_per_s"] == 2.0
+        assert len(aggregator._history) == 1
+
+    @pytest.mark.asyncio
+    async def test_current_returns_tick_payload_while_ticking(self, aggregator):
+        """Testa que, com viewers, a consulta devolve o snapshot do último tick"""
+        ws = make_viewer()
+        aggregator.subscribe(ws)
+        payload = aggregator.tick()
+
+        assert aggregator.current() is payload
+        aggregator.unsubscribe(ws)
+        await wait_stopped(aggregator)
+
+    @pytest.mark.asyncio
+    async def test_tick_serializes_once_for_all_viewers(self, aggregator):
+        """Testa que todos os viewers recebem o mesmo texto calculado no tick"""
+        viewers = [make_viewer() for _ in range(3)]
+        for ws in viewers:
+            aggregator.subscribe(ws)
+
+        payload = aggregator.tick(loop_lag=0.002)
+        await asyncio.gather(*(outbox.join() for outbox in aggregator.viewers.values()))
+
+        for ws in viewers:
+            ws.send_text.assert_called_with(payload)
+        assert json.loads(payload)["loop_lag_ms"] == 2.0
+        for ws in viewers:
+            aggregator.unsubscribe(ws)
+        await wait_stopped(aggregator)
+
+    @pytest.mark.asyncio
+    async def test_periodic_ticks(self, aggregator):
+        """Testa que a task de tick publica enquanto houver viewers"""
+        ws = make_viewer()
+        aggregator.subscribe(ws)
+
+        await asyncio.sleep(0.05)
+        aggregator.unsubscribe(ws)
+        await asyncio.sleep(0.02)
+
+        assert ws.send_text.call_count >= 2
+        assert aggregator._task.done()
+
+    @pytest.mark.asyncio
+    async def test_resubscribe_keeps_ticking(self, aggregator):
+        """Testa que um viewer que chega logo após a saída do último continua recebendo ticks"""
+        first = make_viewer()
+        aggregator.subscribe(first)
+        aggregator.tick()
+        aggregator.unsubscribe(first)
+
+        ws = make_viewer()
+        aggregator.subscribe(ws)
+        await asyncio.sleep(0.05)
+
+        assert aggregator.ticking
+        assert ws.send_text.call_count >= 3
+        aggregator.unsubscribe(ws)
+        await wait_stopped(aggregator)
+
+    @pytest.mark.asyncio
+    async def test_failing_viewer_removed(self, aggregator):
+        """Testa que um viewer com erro de envio é removido"""
+        ws = make_viewer()
+        ws.send_text = AsyncMock(side_effect=Exception("Connection error"))
+        aggregator.subscribe(ws)
+
+        aggregator.tick()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert ws not in aggregator.viewers
+        await wait_stopped(aggregator)
+
+    @pytest.mark.asyncio
+    async def test_queue_stats(self, aggregator, manager):
+        """Testa que a profundidade das filas de saída entra no snapshot"""
+        ws = make_viewer()
+        ws.accept = AsyncMock()
+        await manager.connect(ws)
+
+        for i in range(3):
+            await manager.broadcast(f"event {i}")
+
+        assert aggregator.snapshot()["queue"]["total"] == 3
+        await manager.flush()
+        assert aggregator.snapshot()["queue"]["total"] == 0